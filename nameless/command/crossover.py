@@ -1,137 +1,468 @@
+import asyncio
 import contextlib
+import dataclasses
+import functools
 import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import timedelta
+from typing import Final, override
 
 import discord
 import discord.ui
-from discord.ext import commands
-from prisma.models import CrossChatConnection, CrossChatMessage, CrossChatRoom
+from discord.ext import commands, tasks
+from discord.utils import MISSING
+from prisma.models import CrossChatMember, CrossChatRoom
 
 from nameless import Nameless
-from nameless.custom.cache import nameless_cache
+from nameless.config import nameless_config
+from nameless.custom.crossover import (
+    CrossOverAttachments,
+    CrossOverCircuitOpen,
+    CrossOverClone,
+    CrossOverPayload,
+    CrossOverRemoteError,
+    CrossOverRemoteTarget,
+    CrossOverSnapshot,
+    CrossOverTarget,
+    CrossOverWebhookUnavailable,
+    crossover_edits,
+    crossover_fanout,
+    crossover_messages,
+    crossover_outbox,
+    crossover_processes,
+    crossover_routes,
+    crossover_webhooks,
+)
 from nameless.custom.prisma import NamelessPrisma
 from nameless.custom.types import NamelessTextable
-from nameless.utils import create_cache_key
+from nameless.custom.ui import NamelessPaginatedView
+from nameless.custom.ui.paginated_view import NavigationButton
 
 __all__ = ["CrossOverCommand"]
 
 
 class CrossOverCommand(commands.Cog):
+    _LIST_PAGE_SIZE: Final[int] = 10
+    _NAME_TTL: Final[float] = 60.0
+
     def __init__(self, bot: Nameless):
         self.bot: Nameless = bot
+        self.subscribed_channels: set[int] = set()
+        self.resolved_names: dict[tuple[int, int], tuple[float, str, str]] = {}
 
-    def _create_guild_channel_cache_key(
-        self, this_guild: discord.Guild, this_channel: NamelessTextable
-    ) -> str:
-        """Create (guild,channel) cache key."""
-        return create_cache_key("crossover", str(this_guild.id), str(this_channel.id))
+    @override
+    async def cog_load(self):
+        self._sync_subscriptions()
+        processes: int = nameless_config["crossover"]["relay_processes"]
 
-    async def _get_subscribed_channels(
-        self, this_guild: discord.Guild, this_channel: NamelessTextable
-    ) -> list[tuple[CrossChatConnection, NamelessTextable]]:
-        """Get list of subscribed guild channels."""
-        connections = await CrossChatConnection.prisma().find_many(
-            where={"SourceGuildId": this_guild.id, "SourceChannelId": this_channel.id}
-        )
+        if processes > 0:
+            assert self.bot.http.token is not None
+            crossover_processes.start(self.bot.http.token, processes)
 
-        result: list[tuple[CrossChatConnection, NamelessTextable]] = []
+        await crossover_outbox.start(self._relay_snapshot, self.bot.wait_until_ready)
+        self._prune_dead_members.start()
 
-        for conn in connections:
-            guild = self.bot.get_guild(conn.TargetGuildId)
+    @override
+    async def cog_unload(self):
+        self.bot.message_router.unsubscribe_all(self._relay_message)
+        self.subscribed_channels.clear()
+        self._prune_dead_members.cancel()
+        await crossover_outbox.stop()
+        await crossover_processes.stop()
 
-            if guild is None:
-                continue
+    def _sync_subscriptions(self):
+        """Subscribe to exactly the channels the routing table relays."""
+        relayed = {channel_id for _, channel_id in crossover_routes.channel_rooms}
+        router = self.bot.message_router
+
+        for channel_id in self.subscribed_channels - relayed:
+            router.unsubscribe_channel(channel_id, self._relay_message)
+
+        for channel_id in relayed - self.subscribed_channels:
+            router.subscribe_channel(channel_id, self._relay_message)
+
+        self.subscribed_channels = relayed
 
-            channel = guild.get_channel(conn.TargetChannelId)
+    def _get_subscribed_channels(
+        self, guild_id: int, channel_id: int
+    ) -> list[tuple[CrossOverTarget, NamelessTextable]]:
+        """Get list of subscribed guild channels."""
+        result: list[tuple[CrossOverTarget, NamelessTextable]] = []
+
+        for target in crossover_routes.get_targets(guild_id, channel_id):
+            channel = target.resolve(self.bot)
 
             if channel is None:
                 continue
 
-            if isinstance(channel, NamelessTextable):
-                result.append((conn, channel))
+            result.append((target, channel))
 
         return result
 
-    async def _get_subscribed_messages(
+    def _get_webhook_thread(self, channel: NamelessTextable) -> discord.Thread:
+        """Get `thread` argument for webhook operations."""
+        return channel if isinstance(channel, discord.Thread) else MISSING
+
+    async def _send_relay(
+        self,
+        payload: CrossOverPayload,
+        attachments: CrossOverAttachments,
+        _target: CrossOverTarget,
+        channel: NamelessTextable,
+    ) -> tuple[int, int | None]:
+        """Relay a message to a target channel, returning clone and webhook IDs."""
+        if nameless_config["crossover"]["use_webhook"]:
+            # No "Manage Webhooks" permission, fall back to plain messages.
+            with contextlib.suppress(discord.Forbidden, CrossOverWebhookUnavailable):
+                return await self._send_webhook_relay(payload, attachments, channel)
+
+        return await self._send_embed_relay(payload, attachments, channel)
+
+    async def _send_webhook_relay(
+        self,
+        payload: CrossOverPayload,
+        attachments: CrossOverAttachments,
+        channel: NamelessTextable,
+    ) -> tuple[int, int | None]:
+        """Relay a message through the target channel webhook."""
+        try:
+            return await self._execute_webhook_relay(payload, attachments, channel)
+        except discord.NotFound:
+            # Someone deleted our webhook, try again with a new one.
+            await crossover_webhooks.discard(channel)
+            return await self._execute_webhook_relay(payload, attachments, channel)
+
+    async def _execute_webhook_relay(
+        self,
+        payload: CrossOverPayload,
+        attachments: CrossOverAttachments,
+        channel: NamelessTextable,
+    ) -> tuple[int, int | None]:
+        """Execute the target channel webhook once."""
+        webhook = await crossover_webhooks.get(self.bot, channel)
+
+        cloned_id = await payload.send_as_webhook(
+            webhook, attachments.to_files(), self._get_webhook_thread(channel)
+        )
+
+        return cloned_id, webhook.id
+
+    async def _send_embed_relay(
         self,
-        this_guild: discord.Guild,
-        this_channel: NamelessTextable,
-        this_message: discord.Message,
-    ) -> list[tuple[CrossChatConnection, discord.Message]]:
-        """Get subscribed messages."""
-        connections = await CrossChatConnection.prisma().find_many(
-            where={
-                "SourceGuildId": this_guild.id,
-                "SourceChannelId": this_channel.id,
-                "Messages": {"some": {"OriginMessageId": this_message.id}},
-            },
-            include={"Messages": True},
+        payload: CrossOverPayload,
+        attachments: CrossOverAttachments,
+        channel: NamelessTextable,
+    ) -> tuple[int, int | None]:
+        """Relay a message as an embed sent by nameless* itself."""
+        cloned_id = await payload.send_as_bot(
+            self.bot.http, channel.id, attachments.to_files()
         )
 
-        result: list[tuple[CrossChatConnection, discord.Message]] = []
+        return cloned_id, None
 
-        for conn in connections:
-            guild = self.bot.get_guild(conn.TargetGuildId)
+    async def _to_remote_target(
+        self, target: CrossOverTarget, channel: NamelessTextable
+    ) -> CrossOverRemoteTarget:
+        """Describe a target for a relay process, creating its webhook if needed."""
+        remote_target = CrossOverRemoteTarget(
+            member_id=target.member_id, channel_id=channel.id
+        )
 
-            if guild is None:
-                continue
+        if not nameless_config["crossover"]["use_webhook"]:
+            return remote_target
 
-            channel = guild.get_channel(conn.TargetChannelId)
+        # Relay processes have no gateway cache, so they cannot create
+        # webhooks themselves. No permission, fall back to plain messages.
+        try:
+            webhook = await crossover_webhooks.get(self.bot, channel)
+        except (discord.HTTPException, CrossOverWebhookUnavailable):
+            return remote_target
 
-            if channel is None:
-                continue
+        assert webhook.token is not None
 
-            if not isinstance(channel, NamelessTextable):
-                continue
+        owner = channel.parent if isinstance(channel, discord.Thread) else channel
+        assert owner is not None
 
-            assert conn.Messages is not None
+        return CrossOverRemoteTarget(
+            member_id=target.member_id,
+            channel_id=channel.id,
+            webhook_owner_id=owner.id,
+            webhook=(webhook.id, webhook.token),
+        )
 
-            the_true_id: int = [
-                x.ClonedMessageId
-                for x in conn.Messages
-                if x.OriginMessageId == this_message.id
-            ][0]
+    def _find_clone_webhook(
+        self, channel: NamelessTextable, clone: CrossOverClone
+    ) -> discord.Webhook | None:
+        """Get the webhook a clone was sent through, if it is still ours."""
+        if clone.webhook_id is None:
+            return None
 
-            the_true_message = await channel.fetch_message(the_true_id)
+        webhook = crossover_webhooks.find(self.bot, channel)
 
-            result.append((conn, the_true_message))
+        # Replaced since, after the old one got deleted.
+        if webhook is None or webhook.id != clone.webhook_id:
+            return None
 
-        return result
+        return webhook
 
-    async def _is_connected_to_each_other(
+    async def _edit_relay(
         self,
-        this_guild: discord.Guild,
-        this_channel: NamelessTextable,
-        that_guild: discord.Guild,
-        that_channel: NamelessTextable,
-    ) -> bool:
-        """
-        Return if the 2 rooms are connected.
+        channel: NamelessTextable,
+        clone: CrossOverClone,
+        payload: CrossOverPayload,
+    ):
+        """Propagate an edit to a clone, without fetching it first."""
+        if clone.webhook_id is None:
+            await channel.get_partial_message(clone.cloned_message_id).edit(
+                embed=payload.embed
+            )
+            return
 
-        A room consisting of (guild, channel) can be used interchangably,
-        as long as the "room" is still valid.
-        """
-        conn1 = await CrossChatConnection.prisma().find_first(
-            where={
-                "SourceGuildId": this_guild.id,
-                "SourceChannelId": this_channel.id,
-                "TargetGuildId": that_guild.id,
-                "TargetChannelId": that_channel.id,
-            }
+        webhook = self._find_clone_webhook(channel, clone)
+
+        # Only the webhook which sent a message may edit it.
+        if webhook is None:
+            return
+
+        await webhook.edit_message(
+            clone.cloned_message_id,
+            content=payload.webhook_content,
+            embeds=[*payload.webhook_embeds],
+            thread=self._get_webhook_thread(channel),
         )
 
-        conn2 = await CrossChatConnection.prisma().find_first(
-            where={
-                "SourceGuildId": that_guild.id,
-                "SourceChannelId": that_channel.id,
-                "TargetGuildId": this_guild.id,
-                "TargetChannelId": this_channel.id,
-            }
+    async def _delete_relay(self, channel: NamelessTextable, clone: CrossOverClone):
+        """Propagate a deletion to a clone, without fetching it first."""
+        webhook = self._find_clone_webhook(channel, clone)
+
+        if webhook is not None:
+            await webhook.delete_message(
+                clone.cloned_message_id, thread=self._get_webhook_thread(channel)
+            )
+            return
+
+        # Our own message, or one of a webhook since replaced, which
+        # "Manage Messages" still lets us delete.
+        await channel.get_partial_message(clone.cloned_message_id).delete()
+
+    async def _bulk_delete_relays(
+        self, channel: NamelessTextable, clones: list[CrossOverClone]
+    ):
+        """Propagate a bulk deletion to a target channel."""
+        # Discord refuses to bulk delete anything older than 14 days.
+        bulk_cutoff = discord.utils.utcnow() - timedelta(days=14) + timedelta(minutes=5)
+
+        bulk: list[CrossOverClone] = []
+        single: list[CrossOverClone] = []
+
+        for clone in clones:
+            if discord.utils.snowflake_time(clone.cloned_message_id) > bulk_cutoff:
+                bulk.append(clone)
+            else:
+                single.append(clone)
+
+        for i in range(0, len(bulk), 100):
+            chunk = bulk[i : i + 100]
+
+            try:
+                await channel.delete_messages(
+                    [discord.Object(x.cloned_message_id) for x in chunk]
+                )
+            except discord.HTTPException:
+                # No "Manage Messages" permission, or Discord refused the batch.
+                single.extend(chunk)
+
+        await self._propagate_to_clones(
+            [(channel, x) for x in single], self._delete_relay
         )
 
-        return conn1 is not None and conn2 is not None
+    async def _propagate_to_clones(
+        self,
+        subscribed: Iterable[tuple[NamelessTextable, CrossOverClone]],
+        propagate: Callable[[NamelessTextable, CrossOverClone], Awaitable[None]],
+    ) -> bool:
+        """Propagate a change to every clone concurrently, never raising."""
+        propagated = await asyncio.gather(
+            *[
+                self._propagate_to_clone(channel, clone, propagate)
+                for channel, clone in subscribed
+            ]
+        )
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
+        return any(propagated)
+
+    async def _propagate_to_clone(
+        self,
+        channel: NamelessTextable,
+        clone: CrossOverClone,
+        propagate: Callable[[NamelessTextable, CrossOverClone], Awaitable[None]],
+    ) -> bool:
+        """Propagate a change to a single clone, so it cannot stop the others."""
+        try:
+            await propagate(channel, clone)
+        except discord.NotFound:
+            # Deleted by a moderator, nothing left to propagate to.
+            return False
+        except discord.HTTPException as ex:
+            logging.warning(
+                "Propagating to message %s in channel %s failed: %s.",
+                clone.cloned_message_id,
+                channel.id,
+                repr(ex),
+            )
+            return False
+
+        return True
+
+    async def _get_subscribed_messages(
+        self, guild_id: int, channel_id: int, message_id: int
+    ) -> list[tuple[NamelessTextable, CrossOverClone]]:
+        """Get subscribed messages, as (channel, clone) pairs."""
+        clones: dict[str, CrossOverClone] = {
+            x.member_id: x for x in await crossover_messages.get_clones(message_id)
+        }
+
+        result: list[tuple[NamelessTextable, CrossOverClone]] = []
+
+        for target, channel in self._get_subscribed_channels(guild_id, channel_id):
+            if target.member_id in clones:
+                result.append((channel, clones[target.member_id]))
+
+        return result
+
+    async def _announce(
+        self, targets: Iterable[CrossOverTarget], room_id: str, text: str
+    ):
+        """Send a notice to members of a room."""
+        for target in targets:
+            channel = target.resolve(self.bot)
+
+            if target.room_id != room_id or channel is None:
+                continue
+
+            with contextlib.suppress(discord.HTTPException):
+                await channel.send(text)
+
+    async def _resolve_names(self, target: CrossOverTarget) -> tuple[str, str]:
+        """Get (guild, channel) names of a member, cache first, briefly memoized."""
+        cached = self.resolved_names.get(target.key)
+
+        if cached is not None and time.monotonic() - cached[0] < self._NAME_TTL:
+            return cached[1], cached[2]
+
+        guild = self.bot.get_guild(target.guild_id)
+
+        # Not in that guild anymore, fetching it would be refused anyway.
+        if guild is None:
+            return str(target.guild_id), str(target.channel_id)
+
+        channel = guild.get_channel_or_thread(target.channel_id)
+
+        if channel is None:
+            # Archived threads are not cached.
+            try:
+                channel = await guild.fetch_channel(target.channel_id)
+            except discord.HTTPException:
+                return guild.name, str(target.channel_id)
+
+        self.resolved_names[target.key] = (time.monotonic(), guild.name, channel.name)
+        return guild.name, channel.name
+
+    async def _is_reachable(self, target: CrossOverTarget) -> bool:
+        """Check if a member channel still exists, as far as we can see."""
+        guild = self.bot.get_guild(target.guild_id)
+
+        if guild is None:
+            return False
+
+        # An outage, not a removal.
+        if guild.unavailable:
+            return True
+
+        if guild.get_channel_or_thread(target.channel_id) is not None:
+            return True
+
+        # Archived threads are not cached, ask Discord before giving up.
+        try:
+            await guild.fetch_channel(target.channel_id)
+        except discord.NotFound:
+            return False
+        except discord.HTTPException:
+            return True
+
+        return True
+
+    @tasks.loop(hours=1)
+    async def _prune_dead_members(self):
+        """Remove members whose guild or channel is gone, then tell room hosts."""
+        dead: list[CrossOverTarget] = []
+
+        # Read from the database, members of guilds we were removed from
+        # while offline never made it to the routing table.
+        for member in await CrossChatMember.prisma().find_many():
+            target = CrossOverTarget(
+                member_id=member.Id,
+                room_id=member.RoomId,
+                guild_id=member.GuildId,
+                channel_id=member.ChannelId,
+            )
+
+            if not await self._is_reachable(target):
+                dead.append(target)
+
+        if not dead:
+            return
+
+        logging.warning("Pruning %d unreachable crossover member(s).", len(dead))
+
+        await CrossChatMember.prisma().delete_many(
+            where={"Id": {"in": [x.member_id for x in dead]}}
+        )
+
+        for target in dead:
+            crossover_routes.remove_member(target.member_id)
+
+        self._sync_subscriptions()
+
+        pruned: dict[str, list[CrossOverTarget]] = {}
+
+        for target in dead:
+            pruned.setdefault(target.room_id, []).append(target)
+
+        for room in await CrossChatRoom.prisma().find_many(
+            where={"Id": {"in": [*pruned]}}
+        ):
+            await self._report_pruned(room, pruned[room.Id])
+
+    @_prune_dead_members.before_loop
+    async def _before_prune_dead_members(self):
+        # Guilds are only all known once ready.
+        await self.bot.wait_until_ready()
+
+    async def _report_pruned(self, room: CrossChatRoom, dead: list[CrossOverTarget]):
+        """Tell the host of a room which members were pruned."""
+        host_guild = self.bot.get_guild(room.GuildId)
+        host = host_guild.get_channel_or_thread(room.ChannelId) if host_guild else None
+
+        if not isinstance(host, NamelessTextable):
+            return
+
+        lines: list[str] = []
+
+        for target in dead:
+            guild = self.bot.get_guild(target.guild_id)
+            guild_name = guild.name if guild else str(target.guild_id)
+            lines.append(f"- `{target.channel_id}` @ `{guild_name}`")
+
+        with contextlib.suppress(discord.HTTPException):
+            await host.send(
+                f"Removed {len(dead)} unreachable channel(s) from room `{room.Id}`:\n"
+                + "\n".join(lines)
+            )
+
+    async def _relay_message(self, message: discord.Message):
+        """Relay a message of a crossover-enabled channel."""
         assert message.guild is not None
         assert message.channel is not None
         assert self.bot.user is not None
@@ -139,99 +470,232 @@ class CrossOverCommand(commands.Cog):
         if not isinstance(message.channel, NamelessTextable):
             return
 
-        cache_key = self._create_guild_channel_cache_key(message.guild, message.channel)
-        prefix_list: list[str] = self.bot.get_prefix_list()
-
         # We ignore:
-        # - Message from nameless* itself.
+        # - Message from nameless* itself, or its relay webhooks.
         # - Message without a content.
         # - Actual commands.
-        # - (Guild, Channel) not in cache.
+        # - (Guild, Channel) without any route.
         if (
             message.author.id == self.bot.user.id
+            or crossover_webhooks.is_relay_webhook(message.webhook_id)
             or len(message.content) == 0
-            or any(message.content.startswith(prefix) for prefix in prefix_list)
-            or not nameless_cache.get_key(cache_key)
+            or self.bot.prefix_matcher.is_command(message.content)
+            or not crossover_routes.is_relayed(message.guild.id, message.channel.id)
         ):
             return
 
-        for conn, channel in await self._get_subscribed_channels(
-            message.guild, message.channel
+        crossover_edits.remember(message.id, message.content)
+        await crossover_outbox.enqueue(CrossOverSnapshot.from_message(message))
+
+    async def _relay_snapshot(
+        self, snapshot: CrossOverSnapshot, delivered: set[str]
+    ) -> bool:
+        """Relay a queued message to every target it was not delivered to."""
+        targets: list[tuple[CrossOverTarget, NamelessTextable]] = []
+        complete = True
+
+        for target in crossover_routes.get_targets(
+            snapshot.guild_id, snapshot.channel_id
         ):
-            # Fail-safe
-            nameless_cache.set_key(cache_key)
+            if target.member_id in delivered:
+                continue
 
-            embed = discord.Embed(
-                description=message.content, color=discord.Colour.orange()
-            )
+            guild = self.bot.get_guild(target.guild_id)
 
-            avatar_url = message.author.avatar.url if message.author.avatar else ""
-            guild_icon = message.guild.icon.url if message.guild.icon else ""
+            # Not received from the gateway yet, or an outage: not delivered,
+            # but not gone either.
+            if guild is None or guild.unavailable:
+                complete = False
+                continue
 
-            embed.set_author(
-                name=f"@{message.author.global_name} wrote:", icon_url=avatar_url
+            channel = target.resolve(self.bot)
+
+            if channel is not None:
+                targets.append((target, channel))
+
+        if not targets:
+            return complete
+
+        if crossover_processes.enabled:
+            remote_targets = await asyncio.gather(
+                *[
+                    self._to_remote_target(target, channel)
+                    for target, channel in targets
+                ]
             )
-            embed.set_footer(
-                text=f"{message.guild.name} at #{message.channel.name}",
-                icon_url=guild_icon,
+            result = await crossover_processes.dispatch(
+                snapshot,
+                zip([x for x, _ in targets], remote_targets, strict=True),
             )
-
-            sent_message = await channel.send(
-                embed=embed,
-                stickers=message.stickers,
-                files=[await x.to_file() for x in message.attachments],
+        else:
+            async with CrossOverAttachments(snapshot.attachments) as attachments:
+                payload = CrossOverPayload.render(
+                    dataclasses.replace(snapshot, attachments=attachments.available)
+                )
+                result = await crossover_fanout.dispatch(
+                    targets, functools.partial(self._send_relay, payload, attachments)
+                )
+
+        for target, cloned_id, webhook_id in result.relayed:
+            delivered.add(target.member_id)
+            crossover_messages.add(
+                CrossOverClone(
+                    member_id=target.member_id,
+                    origin_message_id=snapshot.message_id,
+                    cloned_message_id=cloned_id,
+                    webhook_id=webhook_id,
+                )
             )
 
-            await CrossChatMessage.prisma().create(
-                data={
-                    "Connection": {"connect": {"Id": conn.Id}},
-                    "OriginMessageId": message.id,
-                    "ClonedMessageId": sent_message.id,
-                }
-            )
+        for target, ex in result.failed:
+            # Retrying will not bring back permissions, or a channel,
+            # and a paused target will still be paused by then.
+            if isinstance(
+                ex, discord.Forbidden | discord.NotFound | CrossOverCircuitOpen
+            ) or (isinstance(ex, CrossOverRemoteError) and ex.permanent):
+                delivered.add(target.member_id)
+            else:
+                complete = False
+
+        return complete
+
+    async def _propagate_edit(self, snapshot: CrossOverSnapshot) -> bool | None:
+        """Propagate the final state of an edited message to every clone."""
+        # Its clones would be sent with the old content, after this edit.
+        if crossover_outbox.is_queued(snapshot.message_id):
+            return None
+
+        subscribed = await self._get_subscribed_messages(
+            snapshot.guild_id, snapshot.channel_id, snapshot.message_id
+        )
+
+        if not subscribed:
+            return False
+
+        # The embed is a pure function of the source message, so it is
+        # rendered again once instead of fetching a copy from every clone.
+        payload = CrossOverPayload.render(snapshot)
+
+        return await self._propagate_to_clones(
+            subscribed, functools.partial(self._edit_relay, payload=payload)
+        )
 
     @commands.Cog.listener()
-    async def on_message_edit(self, _: discord.Message, message: discord.Message):
-        assert message.guild is not None
-        assert message.channel is not None
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
         assert self.bot.user is not None
 
-        if message.author.id == self.bot.user.id:
+        # Events of channels without any route cost nothing.
+        if payload.guild_id is None or not crossover_routes.is_relayed(
+            payload.guild_id, payload.channel_id
+        ):
             return
 
-        if not isinstance(message.channel, NamelessTextable):
+        # Partial updates (e.g. link embeds) carry no content, nothing to relay.
+        if "content" not in payload.data or "author" not in payload.data:
             return
 
-        for _conn, the_message in await self._get_subscribed_messages(
-            message.guild, message.channel, message
+        author_id = int(payload.data["author"]["id"])
+        webhook_id = payload.data.get("webhook_id")
+
+        # Ignore nameless* itself, and its relay webhooks.
+        if author_id == self.bot.user.id or (
+            webhook_id is not None
+            and crossover_webhooks.is_relay_webhook(int(webhook_id))
         ):
-            the_embed = the_message.embeds[0]
-            the_embed.description = message.content
+            return
+
+        guild = self.bot.get_guild(payload.guild_id)
+        this_channel = (
+            guild.get_channel_or_thread(payload.channel_id) if guild else None
+        )
+
+        if guild is None or not isinstance(this_channel, NamelessTextable):
+            return
 
-            await the_message.edit(embed=the_embed)
+        content = payload.data["content"]
+        cached = payload.cached_message
+
+        # Whatever was cached before this edit is what got relayed last.
+        if (
+            cached is not None
+            and payload.message_id not in crossover_edits.relayed_content
+        ):
+            crossover_edits.remember(payload.message_id, cached.content)
+
+        # Author details come with the event, no need to fetch anyone.
+        crossover_edits.submit(
+            payload.message_id,
+            content,
+            functools.partial(
+                self._propagate_edit,
+                CrossOverSnapshot.from_raw_edit(payload, guild, this_channel),
+            ),
+        )
 
     @commands.Cog.listener()
-    async def on_message_delete(self, message: discord.Message):
-        assert message.guild is not None
-        assert message.channel is not None
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
         assert self.bot.user is not None
 
-        if message.author.id == self.bot.user.id:
+        if payload.guild_id is None or not crossover_routes.is_relayed(
+            payload.guild_id, payload.channel_id
+        ):
             return
 
-        if not isinstance(message.channel, NamelessTextable):
+        crossover_edits.forget(payload.message_id)
+
+        cached = payload.cached_message
+
+        if cached is not None and cached.author.id == self.bot.user.id:
             return
 
-        for _conn, the_message in await self._get_subscribed_messages(
-            message.guild, message.channel, message
+        await self._propagate_to_clones(
+            await self._get_subscribed_messages(
+                payload.guild_id, payload.channel_id, payload.message_id
+            ),
+            self._delete_relay,
+        )
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(
+        self, payload: discord.RawBulkMessageDeleteEvent
+    ):
+        if payload.guild_id is None or not crossover_routes.is_relayed(
+            payload.guild_id, payload.channel_id
+        ):
+            return
+
+        for message_id in payload.message_ids:
+            crossover_edits.forget(message_id)
+
+        clones = await crossover_messages.get_clones_of_many([*payload.message_ids])
+
+        clones_of: dict[str, list[CrossOverClone]] = {}
+
+        for clone in clones:
+            clones_of.setdefault(clone.member_id, []).append(clone)
+
+        for target, channel in self._get_subscribed_channels(
+            payload.guild_id, payload.channel_id
         ):
-            with contextlib.suppress(discord.NotFound):
-                await the_message.delete()
+            if target.member_id in clones_of:
+                await self._bulk_delete_relays(channel, clones_of[target.member_id])
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        crossover_routes.remove_guild(guild.id)
+        self._sync_subscriptions()
 
     @commands.Cog.listener()
-    async def on_bulk_message_delete(self, messages: list[discord.Message]):
-        for message in messages:
-            await self.on_message_delete(message)
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        crossover_routes.remove_channel(channel.id)
+        self._sync_subscriptions()
+
+        await crossover_webhooks.discard(channel)
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        crossover_routes.remove_channel(payload.thread_id)
+        self._sync_subscriptions()
 
     @commands.hybrid_group(fallback="code")
     @commands.guild_only()
@@ -280,6 +744,9 @@ class CrossOverCommand(commands.Cog):
         """
         await ctx.defer()
 
+        assert ctx.guild is not None
+        assert ctx.channel is not None
+
         room_data: CrossChatRoom | None = await CrossChatRoom.prisma().find_first(
             where={"Id": room_code}
         )
@@ -289,16 +756,7 @@ class CrossOverCommand(commands.Cog):
             return
 
         this_guild = ctx.guild
-        that_guild = await ctx.bot.fetch_guild(room_data.GuildId)
-
-        assert this_guild is not None
-        assert that_guild is not None
-
         this_channel = ctx.channel
-        that_channel = await ctx.bot.fetch_channel(room_data.ChannelId)
-
-        assert this_channel is not None
-        assert that_channel is not None
 
         if not isinstance(this_channel, NamelessTextable):
             await ctx.send(
@@ -306,56 +764,40 @@ class CrossOverCommand(commands.Cog):
             )
             return
 
-        assert isinstance(this_channel, NamelessTextable)
-        assert isinstance(that_channel, NamelessTextable)
-
-        if await self._is_connected_to_each_other(
-            this_guild, this_channel, that_guild, that_channel
+        if (
+            room_data.GuildId == this_guild.id
+            and room_data.ChannelId == this_channel.id
         ):
-            await ctx.send("Already connected!")
+            await ctx.send("Don't connect to yourself!")
             return
 
-        if room_data.GuildId == this_guild.id and room_data.ChannelId == ctx.channel.id:
-            await ctx.send("Don't connect to yourself!")
+        if crossover_routes.get_member(room_code, this_guild.id, this_channel.id):
+            await ctx.send("Already connected!")
             return
 
         await NamelessPrisma.get_guild_entry(this_guild)
-        await NamelessPrisma.get_guild_entry(that_guild)
-
-        await CrossChatConnection.prisma().create(
-            data={
-                "RoomId": room_code,
-                "SourceGuildId": this_guild.id,
-                "SourceChannelId": this_channel.id,
-                "TargetGuildId": that_guild.id,
-                "TargetChannelId": that_channel.id,
-            }
-        )
 
-        await ctx.send("Linking success!")
+        # The host only joins its own room along with the first member.
+        for guild_id, channel_id in (
+            (room_data.GuildId, room_data.ChannelId),
+            (this_guild.id, this_channel.id),
+        ):
+            crossover_routes.add_member(
+                await NamelessPrisma.get_room_member_entry(
+                    room_code, guild_id, channel_id
+                )
+            )
 
-        await CrossChatConnection.prisma().create(
-            data={
-                "RoomId": room_code,
-                "SourceGuildId": that_guild.id,
-                "SourceChannelId": that_channel.id,
-                "TargetGuildId": this_guild.id,
-                "TargetChannelId": this_channel.id,
-            }
-        )
+        self._sync_subscriptions()
 
-        assert isinstance(this_channel.name, str)
+        await ctx.send("Linking success!")
 
-        await that_channel.send(
-            f"New connection comes from `#{this_channel.name}` at `{this_guild.name}`!"
+        await self._announce(
+            crossover_routes.get_targets(this_guild.id, this_channel.id),
+            room_code,
+            f"New connection comes from `#{this_channel.name}` at `{this_guild.name}`!",
         )
 
-        this_cache_key = self._create_guild_channel_cache_key(this_guild, this_channel)
-        that_cache_key = self._create_guild_channel_cache_key(that_guild, that_channel)
-
-        nameless_cache.set_key(this_cache_key)
-        nameless_cache.set_key(that_cache_key)
-
     @crossover.command()
     @commands.guild_only()
     @commands.has_guild_permissions(manage_guild=True)
@@ -377,31 +819,8 @@ class CrossOverCommand(commands.Cog):
         assert ctx.guild is not None
         assert ctx.channel is not None
 
-        conn_data: (
-            CrossChatConnection | None
-        ) = await CrossChatConnection.prisma().find_first(
-            where={
-                "RoomId": room_code,
-                "SourceGuildId": ctx.guild.id,
-                "SourceChannelId": ctx.channel.id,
-            }
-        )
-
-        if conn_data is None:
-            await ctx.send("Room code does not exist!")
-            return
-
         this_guild = ctx.guild
-        that_guild = await ctx.bot.fetch_guild(conn_data.TargetGuildId)
-
-        assert this_guild is not None
-        assert that_guild is not None
-
         this_channel = ctx.channel
-        that_channel = await ctx.bot.fetch_channel(conn_data.TargetChannelId)
-
-        assert this_channel is not None
-        assert that_channel is not None
 
         if not isinstance(this_channel, NamelessTextable):
             await ctx.send(
@@ -409,38 +828,36 @@ class CrossOverCommand(commands.Cog):
             )
             return
 
-        assert isinstance(this_channel, NamelessTextable)
-        assert isinstance(that_channel, NamelessTextable)
+        member = crossover_routes.get_member(room_code, this_guild.id, this_channel.id)
 
-        if not await self._is_connected_to_each_other(
-            this_guild, this_channel, that_guild, that_channel
-        ):
+        if member is None:
             await ctx.send("You are not connected to this room!")
             return
 
-        await NamelessPrisma.get_guild_entry(this_guild)
-        await NamelessPrisma.get_guild_entry(that_guild)
+        others = [
+            x
+            for x in crossover_routes.rooms.get(room_code, ())
+            if x.member_id != member.member_id
+        ]
 
-        await CrossChatConnection.prisma().delete_many(
-            where={
-                "RoomId": room_code,
-            }
-        )
+        if len(others) > 1:
+            await CrossChatMember.prisma().delete_many(where={"Id": member.member_id})
+            crossover_routes.remove_member(member.member_id)
+        else:
+            # Nobody left to talk to, close the room.
+            await CrossChatMember.prisma().delete_many(where={"RoomId": room_code})
+            crossover_routes.remove_room(room_code)
 
-        await ctx.send("Disconnection success!")
+        self._sync_subscriptions()
 
-        assert isinstance(this_channel.name, str)
+        await ctx.send("Disconnection success!")
 
-        await that_channel.send(
-            f"Disconnected from `#{this_channel.name}` at `{this_guild.name}`!"
+        await self._announce(
+            others,
+            room_code,
+            f"Disconnected from `#{this_channel.name}` at `{this_guild.name}`!",
         )
 
-        this_cache_key = self._create_guild_channel_cache_key(this_guild, this_channel)
-        that_cache_key = self._create_guild_channel_cache_key(that_guild, that_channel)
-
-        nameless_cache.invalidate_key(this_cache_key)
-        nameless_cache.invalidate_key(that_cache_key)
-
     @crossover.command()
     @commands.guild_only()
     @commands.has_guild_permissions(manage_guild=True)
@@ -451,34 +868,99 @@ class CrossOverCommand(commands.Cog):
         assert ctx.guild is not None
         assert ctx.channel is not None
 
-        connections = await CrossChatConnection.prisma().find_many(
-            where={"SourceGuildId": ctx.guild.id, "SourceChannelId": ctx.channel.id},
-            distinct=["RoomId"],
-        )
+        key = (ctx.guild.id, ctx.channel.id)
+        targets = [
+            target
+            for room_id in crossover_routes.channel_rooms.get(key, ())
+            for target in crossover_routes.rooms[room_id]
+            if target.key != key
+        ]
+
+        if not targets:
+            await ctx.send("This channel is not connected to any room.")
+            return
 
-        rooms: list[str] = []
+        names = await asyncio.gather(*[self._resolve_names(x) for x in targets])
+        rooms = [
+            f"`{target.room_id}` : `#{channel_name}` @ `{guild_name}`"
+            for target, (guild_name, channel_name) in zip(targets, names, strict=True)
+        ]
 
-        for conn in connections:
-            that_guild = await ctx.bot.fetch_guild(conn.TargetGuildId)
-            that_channel = await that_guild.fetch_channel(conn.TargetChannelId)
+        pages: list[discord.Embed] = []
 
-            rooms.append(
-                f"`{conn.RoomId}` : `#{that_channel.name}` @ `{that_guild.name}`"
+        for i in range(0, len(rooms), self._LIST_PAGE_SIZE):
+            embed = discord.Embed(
+                description="All available connections, both in/outbound!",
+                color=discord.Colour.orange(),
+                title="Connection list",
             )
 
-        embed = discord.Embed(
-            description="All available connections, both in/outbound!",
-            color=discord.Colour.orange(),
-            title="Connection list",
-        )
+            embed.set_thumbnail(url=ctx.guild.icon.url if ctx.guild.icon else "")
+            embed.add_field(
+                name="All connected rooms",
+                value="\n".join(rooms[i : i + self._LIST_PAGE_SIZE]),
+            )
+            embed.set_footer(
+                text=f"Page {len(pages) + 1} of "
+                + f"{-(-len(rooms) // self._LIST_PAGE_SIZE)}"
+            )
+
+            pages.append(embed)
+
+        view = NamelessPaginatedView(ctx)
+        view.add_pages(pages)
+
+        if len(pages) > 1:
+            view.add_button(NavigationButton.back())
+            view.add_button(NavigationButton.next())
+
+        view.add_button(NavigationButton.end())
+
+        await view.start()
 
-        embed.set_thumbnail(url=ctx.guild.icon.url if ctx.guild.icon else "")
-        embed.add_field(name="All connected rooms", value="\n".join(rooms))
+    @crossover.command()
+    @commands.guild_only()
+    @commands.has_guild_permissions(manage_guild=True)
+    async def stats(self, ctx: commands.Context[Nameless]):
+        """View relay latency of connected rooms."""
+        await ctx.defer()
+
+        assert ctx.guild is not None
+        assert ctx.channel is not None
 
-        await ctx.send(
-            embed=embed,
+        if not isinstance(ctx.channel, NamelessTextable):
+            await ctx.send(
+                "You are not inside our accepted channel type (Text/Thread)."
+            )
+            return
+
+        rows: list[str] = []
+
+        for target, channel in self._get_subscribed_channels(
+            ctx.guild.id, ctx.channel.id
+        ):
+            stats = crossover_fanout.get_stats(target.channel_id)
+            rows.append(
+                f"`#{channel.name}` @ `{channel.guild.name}`: "
+                + f"{stats.sent} sent, {stats.failed} failed, "
+                + f"{stats.skipped} skipped, "
+                + f"avg {stats.average_latency:.2f}s, max {stats.max_latency:.2f}s"
+                + (" (paused)" if stats.is_open else "")
+            )
+
+        if not rows:
+            await ctx.send("This channel is not connected to any room.")
+            return
+
+        rows.append(
+            f"Outbox: {crossover_outbox.depth} queued, "
+            + f"oldest {crossover_outbox.oldest_age:.2f}s, "
+            + f"{crossover_outbox.retried_count} retried, "
+            + f"{crossover_outbox.dropped_count} dropped"
         )
 
+        await ctx.send("\n".join(rows))
+
 
 async def setup(bot: Nameless):
     await bot.add_cog(CrossOverCommand(bot))
@@ -1,5 +1,5 @@
-import contextlib
 import logging
+from typing import override
 
 import discord
 import discord.ui
@@ -7,9 +7,8 @@ from discord.ext import commands
 from prisma.models import Guild
 
 from nameless import Nameless
-from nameless.custom.cache import nameless_cache
+from nameless.custom.honeypot import honeypot_baits, honeypot_bans
 from nameless.custom.prisma import NamelessPrisma
-from nameless.utils import create_cache_key
 
 __all__ = ["HoneypotCommand"]
 
@@ -18,18 +17,25 @@ class HoneypotCommand(commands.Cog):
     def __init__(self, bot: Nameless):
         self.bot: Nameless = bot
 
-    def _create_honeypot_cache_key(self, this_guild: discord.Guild) -> str:
-        """Create honeypot cache key."""
-        return create_cache_key("honeypot", str(this_guild.id))
+    @override
+    async def cog_load(self):
+        # Only bait channels, the rest of the guild never reaches us.
+        for channel_id in honeypot_baits.bait_guilds:
+            self.bot.message_router.subscribe_channel(channel_id, self._catch_spammer)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
+    @override
+    async def cog_unload(self):
+        self.bot.message_router.unsubscribe_all(self._catch_spammer)
+        await honeypot_bans.stop()
+
+    async def _catch_spammer(self, message: discord.Message):
+        """Ban whoever chats in the spam-bait channel."""
         assert message.author is not None
         assert message.guild is not None
         assert message.channel is not None
         assert self.bot.user is not None
 
-        if not nameless_cache.get_key(self._create_honeypot_cache_key(message.guild)):
+        if honeypot_baits.get(message.guild.id) != message.channel.id:
             return
 
         # don't ban self, let admin do it.
@@ -38,16 +44,7 @@ class HoneypotCommand(commands.Cog):
 
         assert isinstance(message.author, discord.Member)
 
-        db_guild = await Guild.prisma().find_unique_or_raise(
-            where={"Id": message.guild.id}
-        )
-
-        if message.channel.id == db_guild.HoneypotChannelId:
-            with contextlib.suppress(discord.errors.Forbidden):
-                await message.author.ban(
-                    delete_message_days=0,
-                    reason="Chat in spam bait channel.",
-                )
+        honeypot_bans.submit(message.author, "Chat in spam bait channel.")
 
     @commands.hybrid_group(fallback="activate")
     @commands.guild_only()
@@ -61,7 +58,7 @@ class HoneypotCommand(commands.Cog):
 
         await NamelessPrisma.get_guild_entry(ctx.guild)
 
-        if nameless_cache.get_key(self._create_honeypot_cache_key(ctx.guild)):
+        if honeypot_baits.get(ctx.guild.id) is not None:
             await ctx.send("You already activated the honeypot.")
             return
 
@@ -75,7 +72,10 @@ class HoneypotCommand(commands.Cog):
             data={"HoneypotChannelId": created_channel.id}, where={"Id": ctx.guild.id}
         )
 
-        nameless_cache.set_key(self._create_honeypot_cache_key(ctx.guild))
+        honeypot_baits.add(ctx.guild.id, created_channel.id)
+        self.bot.message_router.subscribe_channel(
+            created_channel.id, self._catch_spammer
+        )
 
         await ctx.send(
             f"Created spam-bait channel {created_channel.mention}. "
@@ -91,20 +91,62 @@ class HoneypotCommand(commands.Cog):
 
         assert ctx.guild is not None
 
-        if not nameless_cache.get_key(self._create_honeypot_cache_key(ctx.guild)):
+        channel_id = honeypot_baits.get(ctx.guild.id)
+
+        if channel_id is None:
             await ctx.send("You don't have spam-bait activated.")
             return
 
-        await NamelessPrisma.get_guild_entry(ctx.guild)
-        db_guild = await Guild.prisma().find_unique_or_raise(where={"Id": ctx.guild.id})
-
-        created_channel = await ctx.guild.fetch_channel(db_guild.HoneypotChannelId)
+        created_channel = await ctx.guild.fetch_channel(channel_id)
 
-        nameless_cache.invalidate_key(self._create_honeypot_cache_key(ctx.guild))
+        await self._forget_bait(ctx.guild.id)
         await created_channel.delete()
 
         await ctx.send(f"Deleted spam-bait channel `#{created_channel.name}`.")
 
+    @honeypot.command()
+    @commands.guild_only()
+    @commands.has_guild_permissions(manage_guild=True)
+    async def stats(self, ctx: commands.Context[Nameless]):
+        """View how fast spam-bait bans raiders."""
+        await ctx.defer()
+
+        assert ctx.guild is not None
+
+        if honeypot_baits.get(ctx.guild.id) is None:
+            await ctx.send("You don't have spam-bait activated.")
+            return
+
+        stats = honeypot_bans.get_stats(ctx.guild.id)
+
+        await ctx.send(
+            f"{stats.banned} banned, {stats.failed} failed, "
+            + f"{stats.deduped} duplicate(s) skipped, "
+            + f"{honeypot_bans.get_depth(ctx.guild.id)} pending.\n"
+            + f"Latency: avg {stats.average_latency:.2f}s, "
+            + f"max {stats.max_latency:.2f}s.\n"
+            + f"Latest raid: {stats.last_burst_banned} banned "
+            + f"in {stats.last_burst_duration:.2f}s "
+            + f"({stats.last_burst_rate:.1f}/s)."
+        )
+
+    async def _forget_bait(self, guild_id: int):
+        """Deactivate the honeypot of a guild, in memory and in the database."""
+        channel_id = honeypot_baits.remove_guild(guild_id)
+
+        if channel_id is not None:
+            self.bot.message_router.unsubscribe_channel(channel_id, self._catch_spammer)
+
+        await Guild.prisma().update_many(
+            data={"HoneypotChannelId": 0}, where={"Id": guild_id}
+        )
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        # Someone deleted the bait channel by hand.
+        if honeypot_baits.is_bait(channel.id):
+            await self._forget_bait(channel.guild.id)
+
 
 async def setup(bot: Nameless):
     await bot.add_cog(HoneypotCommand(bot))
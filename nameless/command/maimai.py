@@ -7,10 +7,9 @@ from prisma.models import User
 
 from nameless import Nameless
 from nameless.custom.cache import nameless_cache
-from nameless.custom.maimai.maimai import MaimaiClient
+from nameless.custom.maimai.maimai import MAIMAI_CACHE_NAMESPACE, MaimaiClient
 from nameless.custom.maimai.models import MaimaiUser
 from nameless.custom.prisma import NamelessPrisma
-from nameless.utils import create_cache_key
 
 __all__ = ["MaimaiCommand"]
 
@@ -20,25 +19,40 @@ class MaimaiCommand(commands.Cog):
         self.bot: Nameless = bot
         self.moimoi_api: MaimaiClient = MaimaiClient()
 
-    def _create_maimai_cache_key(self, user: discord.User | discord.Member) -> str:
-        return create_cache_key("maimai", str(user.id))
+    async def _get_friend_code(self, user: discord.User | discord.Member) -> int | None:
+        """Get the linked friend code of a user, memory first."""
+        entry = nameless_cache.get(MAIMAI_CACHE_NAMESPACE, str(user.id))
+
+        if entry is not None:
+            if entry.negative:
+                return None
+
+            assert isinstance(entry.value, int)
+            return entry.value
+
+        db_user = await User.prisma().find_unique(where={"Id": user.id})
+
+        if db_user is None or db_user.MaimaiFriendCode == 0:
+            nameless_cache.set_missing(MAIMAI_CACHE_NAMESPACE, str(user.id))
+            return None
+
+        nameless_cache.set(
+            MAIMAI_CACHE_NAMESPACE, str(user.id), db_user.MaimaiFriendCode
+        )
+        return db_user.MaimaiFriendCode
 
     @commands.hybrid_group(fallback="profile")
     async def maimai(self, ctx: commands.Context[Nameless]):
         """View your linked maimai profile."""
         await ctx.defer()
 
-        cache_key = self._create_maimai_cache_key(ctx.author)
+        friend_code = await self._get_friend_code(ctx.author)
 
-        if not nameless_cache.get_key(cache_key):
+        if friend_code is None:
             await ctx.send("You have not linked with me, *yet*.")
             return
 
-        db_user = await NamelessPrisma.get_user_entry(ctx.author)
-
-        moi_user: MaimaiUser = self.moimoi_api.find_by_friend_code(
-            db_user.MaimaiFriendCode
-        )
+        moi_user: MaimaiUser = self.moimoi_api.find_by_friend_code(friend_code)
 
         embed = (
             discord.Embed(
@@ -69,7 +83,7 @@ class MaimaiCommand(commands.Cog):
 
             await ctx.send("Linkage complete!")
 
-            nameless_cache.set_key(self._create_maimai_cache_key(ctx.author))
+            nameless_cache.set(MAIMAI_CACHE_NAMESPACE, str(ctx.author.id), friend_code)
         except Exception:
             await ctx.send("Invalid friend code, or I have been hitting with 429s.")
             return
@@ -1,4 +1,9 @@
 from .cache import *
+from .crossover import *
+from .honeypot import *
 from .maimai import *
+from .prefix import *
 from .prisma import *
+from .router import *
 from .types import *
+from .warmup import *
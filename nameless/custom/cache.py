@@ -1,18 +1,77 @@
+import json
 import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import TextIOWrapper
 from pathlib import Path
+from typing import Final
 
-__all__ = ["nameless_cache"]
+from nameless.config import nameless_config
 
+__all__ = [
+    "NamelessCacheValue",
+    "NamelessCacheEntry",
+    "NamelessCache",
+    "nameless_cache",
+]
 
-class NamelessKeyCache:
-    """A simple key-only cache, with internal logging and persitence support."""
+NamelessCacheValue = str | int | float | bool | None
+"""A cacheable value, anything that survives a JSON round trip as is."""
 
-    def __init__(self):
-        self.cache: dict[str, bool] = {}
+
+@dataclass(slots=True)
+class NamelessCacheEntry:
+    """A cached value, or the knowledge that there is none."""
+
+    value: NamelessCacheValue
+    negative: bool = False
+    expires_at: float | None = None
+
+    @property
+    def is_expired(self) -> bool:
+        """Whether this entry outlived its TTL."""
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+
+class NamelessCache:
+    """
+    A namespaced value cache, with TTL, LRU eviction and persistence support.
+
+    Entries are keyed by (namespace, key) and hold a value, or a negative
+    entry recording that the database has nothing for that key, so
+    repeated lookups of missing data stay off the database too. Once
+    `max_entries` is reached, the least recently used entry goes first.
+
+    Every change is appended to a journal as it happens, and the journal
+    is compacted into a snapshot once it outgrows the cache. Startup
+    replays the snapshot, then the journal, so a crash or a restart
+    without `close` loses nothing.
+    """
+
+    _COMPACT_MIN_LINES: Final[int] = 1000
+
+    def __init__(self, max_entries: int | None = None):
+        self.entries: OrderedDict[tuple[str, str], NamelessCacheEntry] = OrderedDict()
+        self.max_entries: int = (
+            max_entries
+            if max_entries is not None
+            else nameless_config["cache"]["max_entries"]
+        )
         self.cache_path: Path = Path(__file__).parent.parent.parent / "nameless.cache"
+        self.journal_path: Path = self.cache_path.with_suffix(".cache-journal")
+        self._journal: TextIOWrapper | None = None
+        self._journal_lines: int = 0
+
+        self.hits: int = 0
+        self.negative_hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
 
     def populate_from_persistence(self) -> None:
-        """Read from cache persistence."""
+        """Read from cache persistence, then start journaling changes."""
         logging.info("Reading cache file.")
 
         # Create cold cache if needed.
@@ -21,32 +80,193 @@ class NamelessKeyCache:
             self.cache_path.touch(exist_ok=False)
 
         with open(self.cache_path, encoding="utf-8") as f:
-            lines = f.read().splitlines()
-            for line in lines:
-                self.cache[line] = True
+            for line in f:
+                self._load_line(line)
+
+        if self.journal_path.exists():
+            replayed = 0
+
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    replayed += self._replay_line(line)
+
+            logging.info("Replayed %d cache journal entries.", replayed)
+
+        logging.info("Read %d cache entries.", len(self.entries))
+
+        # Fold the replayed journal in, so the next startup reads less.
+        self.compact()
 
     def yank_to_persitence(self) -> None:
-        """Write to cache persistence."""
+        """Write to cache persistence, and stop journaling changes."""
         logging.info("Writing to cache file.")
 
-        with open(self.cache_path, mode="w", encoding="utf-8") as f:
-            for key in self.cache:
-                f.write(f"{key}\n")
+        self.compact()
+
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def compact(self) -> None:
+        """Write a snapshot of the whole cache, then start an empty journal."""
+        temp_path = self.cache_path.with_suffix(".cache-tmp")
+
+        with open(temp_path, mode="w", encoding="utf-8") as f:
+            for (namespace, key), entry in self.entries.items():
+                if entry.is_expired:
+                    continue
+
+                f.write(
+                    json.dumps(
+                        [namespace, key, entry.value, entry.negative, entry.expires_at]
+                    )
+                    + "\n"
+                )
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Atomic, a crash leaves either the old snapshot or the new one,
+        # and the old journal still applies on top of both.
+        os.replace(temp_path, self.cache_path)
+
+        if self._journal is not None:
+            self._journal.close()
+
+        # Kept open across calls, appending is the whole point.
+        self._journal = open(self.journal_path, mode="w", encoding="utf-8")  # noqa: SIM115
+        self._journal_lines = 0
+
+    def get(self, namespace: str, key: str) -> NamelessCacheEntry | None:
+        """Look a key up, `None` meaning the cache knows nothing about it."""
+        cache_key = (namespace, key)
+        entry = self.entries.get(cache_key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.is_expired:
+            del self.entries[cache_key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(cache_key)
+
+        if entry.negative:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+
+        return entry
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: NamelessCacheValue,
+        *,
+        ttl: float | None = None,
+    ) -> None:
+        """Cache a value, for `ttl` seconds or until evicted."""
+        logging.debug("Cache key [%s/%s] has been set.", namespace, key)
+
+        entry = NamelessCacheEntry(value, False, self._expiry(ttl))
+        self._put(namespace, key, entry)
+        self._append(["set", namespace, key, value, False, entry.expires_at])
+
+    def set_missing(self, namespace: str, key: str, *, ttl: float | None = None):
+        """Cache that a key has no value, for `ttl` seconds or until evicted."""
+        logging.debug("Cache key [%s/%s] has been set as missing.", namespace, key)
+
+        entry = NamelessCacheEntry(None, True, self._expiry(ttl))
+        self._put(namespace, key, entry)
+        self._append(["set", namespace, key, None, True, entry.expires_at])
+
+    def invalidate(self, namespace: str, key: str) -> None:
+        """Forget a key, so the next lookup goes to the source again."""
+        logging.debug("Cache key [%s/%s] has been invalidated.", namespace, key)
+
+        if self.entries.pop((namespace, key), None) is not None:
+            self._append(["del", namespace, key])
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        """Forget every key of a namespace."""
+        logging.debug("Cache namespace [%s] has been invalidated.", namespace)
+
+        for cache_key in [x for x in self.entries if x[0] == namespace]:
+            del self.entries[cache_key]
+
+        self._append(["drop", namespace])
+
+    def _expiry(self, ttl: float | None) -> float | None:
+        """Turn a TTL into a wall clock deadline, which survives restarts."""
+        return None if ttl is None else time.time() + ttl
+
+    def _put(self, namespace: str, key: str, entry: NamelessCacheEntry) -> None:
+        """Insert or replace an entry, evicting the least recently used ones."""
+        cache_key = (namespace, key)
+
+        self.entries[cache_key] = entry
+        self.entries.move_to_end(cache_key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _append(self, operation: list[NamelessCacheValue]) -> None:
+        """Journal a change, compacting once the journal outgrows the cache."""
+        if self._journal is None:
+            return
+
+        # Flushed right away, `os.execl` and the OOM killer skip buffers.
+        self._journal.write(json.dumps(operation) + "\n")
+        self._journal.flush()
+        self._journal_lines += 1
+
+        if self._journal_lines > max(self._COMPACT_MIN_LINES, len(self.entries)):
+            self.compact()
+
+    def _replay_line(self, line: str) -> int:
+        """Apply one journaled change, returning 0 if it was unreadable."""
+        try:
+            operation, namespace, *args = json.loads(line)
+        except (ValueError, TypeError):
+            # A torn last line, from a crash mid-write.
+            return 0
+
+        match operation:
+            case "set":
+                key, value, negative, expires_at = args
+                entry = NamelessCacheEntry(value, negative, expires_at)
+
+                if entry.is_expired:
+                    self.entries.pop((namespace, key), None)
+                else:
+                    self._put(namespace, key, entry)
+            case "del":
+                self.entries.pop((namespace, args[0]), None)
+            case "drop":
+                for cache_key in [x for x in self.entries if x[0] == namespace]:
+                    del self.entries[cache_key]
+            case _:
+                return 0
+
+        return 1
 
-    def set_key(self, key: str) -> None:
-        """Flag a key to be exist."""
-        logging.debug("Cache key [%s] has been validated.", key)
-        self.cache[key] = True
+    def _load_line(self, line: str) -> None:
+        """Load one persisted entry, skipping anything unreadable."""
+        try:
+            namespace, key, value, negative, expires_at = json.loads(line)
+        except (ValueError, TypeError):
+            # Key-only entries of older versions, the database has them anyway.
+            return
 
-    def get_key(self, key: str) -> bool:
-        """Check if `key` exists in cache."""
-        logging.debug("Cache key [%s] has been looked up.", key)
-        return key in self.cache
+        entry = NamelessCacheEntry(value, negative, expires_at)
 
-    def invalidate_key(self, key: str) -> None:
-        """Invalidate a key."""
-        logging.debug("Cache key [%s] has been invalidated.", key)
-        del self.cache[key]
+        if not entry.is_expired:
+            self._put(namespace, key, entry)
 
 
-nameless_cache = NamelessKeyCache()
+nameless_cache = NamelessCache()
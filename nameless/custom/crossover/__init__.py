@@ -0,0 +1,12 @@
+from .attachments import *
+from .edits import *
+from .messages import *
+from .migration import *
+from .outbox import *
+from .payload import *
+from .processes import *
+from .retention import *
+from .routing import *
+from .scheduler import *
+from .snapshot import *
+from .webhooks import *
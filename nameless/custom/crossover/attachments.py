@@ -0,0 +1,187 @@
+import asyncio
+import io
+import logging
+import tempfile
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Final, Self
+
+import aiohttp
+import discord
+
+from nameless.custom.crossover.snapshot import CrossOverAttachmentInfo
+
+__all__ = ["CrossOverAttachments"]
+
+# Per process, so CDN connections are pooled across relays.
+_session: aiohttp.ClientSession | None = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Get the download session, opening it on first use."""
+    global _session
+
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession()
+
+    return _session
+
+
+@dataclass(frozen=True, slots=True)
+class _SharedAttachment:
+    """A downloaded attachment, held in memory or spilled on disk."""
+
+    filename: str
+    description: str | None
+    spoiler: bool
+    content: bytes | None = None
+    path: Path | None = None
+
+    def to_file(self) -> discord.File:
+        """Create a single-use upload view over the shared data."""
+        fp: Path | io.BytesIO
+
+        if self.path is not None:
+            fp = self.path
+        else:
+            assert self.content is not None
+
+            # BytesIO shares the underlying bytes until written to,
+            # so every view costs a few objects, not another copy.
+            fp = io.BytesIO(self.content)
+
+        return discord.File(
+            fp,
+            filename=self.filename,
+            spoiler=self.spoiler,
+            description=self.description,
+        )
+
+
+class CrossOverAttachments:
+    """
+    Attachments of a relayed message, downloaded exactly once.
+
+    Small attachments are kept in memory, larger ones are streamed into
+    a temporary directory, which is removed when the context exits.
+    Downloads of every relay share one session, and its connections.
+
+    An attachment failing to download is left out instead of failing
+    the relay, queued messages are often replayed after their signed
+    CDN links expired. Relay bodies must be rendered from `available`.
+    """
+
+    _SPILL_THRESHOLD: Final[int] = 4 * 1024 * 1024
+    _CHUNK_SIZE: Final[int] = 64 * 1024
+
+    def __init__(self, attachments: Sequence[CrossOverAttachmentInfo]):
+        self.attachments: Sequence[CrossOverAttachmentInfo] = attachments
+        self.items: list[_SharedAttachment] = []
+        self.available: tuple[CrossOverAttachmentInfo, ...] = ()
+        self._temp_dir: tempfile.TemporaryDirectory[str] | None = None
+
+    @staticmethod
+    async def close_session() -> None:
+        """Close the download session of this process, if it was opened."""
+        global _session
+
+        if _session is not None:
+            await _session.close()
+            _session = None
+
+    async def __aenter__(self) -> Self:
+        if not self.attachments:
+            return self
+
+        session = _get_session()
+        fetched = await asyncio.gather(
+            *[
+                self._try_fetch(session, index, x)
+                for index, x in enumerate(self.attachments)
+            ]
+        )
+
+        self.items = [x for x in fetched if x is not None]
+        self.available = tuple(
+            info
+            for info, item in zip(self.attachments, fetched, strict=True)
+            if item is not None
+        )
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.items = []
+        self.available = ()
+
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+
+    def to_files(self) -> list[discord.File]:
+        """Create upload views for one relay target."""
+        return [x.to_file() for x in self.items]
+
+    async def _try_fetch(
+        self,
+        session: aiohttp.ClientSession,
+        index: int,
+        attachment: CrossOverAttachmentInfo,
+    ) -> _SharedAttachment | None:
+        """Download an attachment, `None` if it cannot be."""
+        try:
+            return await self._fetch(session, index, attachment)
+        except (aiohttp.ClientError, TimeoutError, OSError) as ex:
+            logging.warning(
+                "Skipping attachment %s of a relay: %s.", attachment.filename, repr(ex)
+            )
+            return None
+
+    async def _fetch(
+        self,
+        session: aiohttp.ClientSession,
+        index: int,
+        attachment: CrossOverAttachmentInfo,
+    ) -> _SharedAttachment:
+        """Download an attachment, spilling it to disk if it is too large."""
+        async with session.get(attachment.url) as response:
+            response.raise_for_status()
+
+            if attachment.size <= self._SPILL_THRESHOLD:
+                return _SharedAttachment(
+                    filename=attachment.filename,
+                    description=attachment.description,
+                    spoiler=attachment.spoiler,
+                    content=await response.read(),
+                )
+
+            logging.debug(
+                "Spilling attachment %s (%d bytes) to disk.",
+                attachment.filename,
+                attachment.size,
+            )
+
+            if self._temp_dir is None:
+                self._temp_dir = tempfile.TemporaryDirectory(
+                    prefix="nameless-crossover-"
+                )
+
+            path = Path(self._temp_dir.name) / str(index)
+
+            with open(path, mode="wb") as f:
+                async for chunk in response.content.iter_chunked(self._CHUNK_SIZE):
+                    f.write(chunk)
+
+        return _SharedAttachment(
+            filename=attachment.filename,
+            description=attachment.description,
+            spoiler=attachment.spoiler,
+            path=path,
+        )
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Final
+
+__all__ = ["CrossOverEditCoalescer", "crossover_edits"]
+
+_EditPropagator = Callable[[], Awaitable[bool | None]]
+"""
+A coroutine propagating an edit to every clone of a message.
+
+Returns
+-------
+`bool | None`
+    Whether any clone was edited, `None` if the message is not relayed
+    yet, which tries again after another window.
+"""
+
+
+class CrossOverEditCoalescer:
+    """
+    Per-origin-message edit debouncer.
+
+    Bursts of edits within a short window collapse into the last one,
+    and an edit whose content is what was relayed last is dropped. An
+    edit of a message still waiting in the outbox waits for it to be
+    relayed, clones of the old content would be left behind otherwise.
+    """
+
+    _WINDOW: Final[float] = 1.5
+    _MAX_REMEMBERED: Final[int] = 4096
+
+    def __init__(self):
+        self.relayed_content: OrderedDict[int, str] = OrderedDict()
+        self._pending: dict[int, asyncio.Task[None]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def remember(self, origin_message_id: int, content: str) -> None:
+        """Record the content last relayed for an origin message."""
+        self.relayed_content[origin_message_id] = content
+        self.relayed_content.move_to_end(origin_message_id)
+
+        if len(self.relayed_content) > self._MAX_REMEMBERED:
+            self.relayed_content.popitem(last=False)
+
+    def is_unchanged(self, origin_message_id: int, content: str) -> bool:
+        """Check if `content` is what was relayed last."""
+        return self.relayed_content.get(origin_message_id) == content
+
+    def submit(
+        self,
+        origin_message_id: int,
+        content: str,
+        propagate: _EditPropagator,
+    ) -> None:
+        """Propagate an edit after the window, unless a newer one comes first."""
+        if self.is_unchanged(origin_message_id, content):
+            self.cancel(origin_message_id)
+            return
+
+        self.cancel(origin_message_id)
+
+        task = asyncio.create_task(
+            self._propagate_later(origin_message_id, content, propagate)
+        )
+        self._pending[origin_message_id] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def cancel(self, origin_message_id: int) -> None:
+        """Drop the pending edit of an origin message, if any."""
+        task = self._pending.pop(origin_message_id, None)
+
+        if task is not None:
+            task.cancel()
+
+    async def stop(self) -> None:
+        """Cancel every edit still waiting, or propagating."""
+        tasks = [*self._tasks]
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
+
+    def forget(self, origin_message_id: int) -> None:
+        """Forget everything about an origin message, e.g. after deletion."""
+        self.cancel(origin_message_id)
+        self.relayed_content.pop(origin_message_id, None)
+
+    async def _propagate_later(
+        self,
+        origin_message_id: int,
+        content: str,
+        propagate: _EditPropagator,
+    ) -> None:
+        """Debounce timer body."""
+        while True:
+            await asyncio.sleep(self._WINDOW)
+
+            # From here on, a newer edit must not cancel this one half-way.
+            task = self._pending.pop(origin_message_id)
+
+            try:
+                edited = await propagate()
+            except Exception as ex:
+                logging.error("Failed to propagate an edit.", exc_info=ex)
+                return
+
+            if edited:
+                self.remember(origin_message_id, content)
+
+            # Not relayed yet, try again unless a newer edit took over.
+            if edited is not None or origin_message_id in self._pending:
+                return
+
+            self._pending[origin_message_id] = task
+
+
+crossover_edits = CrossOverEditCoalescer()
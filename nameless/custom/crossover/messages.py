@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Final
+
+from prisma.models import CrossChatMessage
+from prisma.types import CrossChatMessageCreateWithoutRelationsInput
+
+__all__ = ["CrossOverClone", "CrossOverMessageBuffer", "crossover_messages"]
+
+
+@dataclass(frozen=True, slots=True)
+class CrossOverClone:
+    """An origin -> clone mapping of a relayed message."""
+
+    member_id: str
+    origin_message_id: int
+    cloned_message_id: int
+    webhook_id: int | None = None
+
+
+class CrossOverMessageBuffer:
+    """
+    Write-behind buffer of relayed message mappings.
+
+    Mappings are written with a single `create_many` once enough of them
+    pile up, or shortly after the first one arrives, whichever is first.
+    Unwritten mappings stay visible through `get_pending`.
+    """
+
+    _FLUSH_SIZE: Final[int] = 100
+    _FLUSH_INTERVAL: Final[float] = 2.0
+
+    def __init__(self):
+        self.pending: dict[int, list[CrossOverClone]] = {}
+        self.pending_count: int = 0
+        self._writing: dict[int, list[CrossOverClone]] = {}
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+
+    def add(self, clone: CrossOverClone) -> None:
+        """Queue a mapping to be written."""
+        self.pending.setdefault(clone.origin_message_id, []).append(clone)
+        self.pending_count += 1
+
+        if self.pending_count >= self._FLUSH_SIZE:
+            self._schedule_flush(0)
+        elif self._flush_task is None:
+            self._schedule_flush(self._FLUSH_INTERVAL)
+
+    async def get_clones(self, origin_message_id: int) -> list[CrossOverClone]:
+        """Get every mapping of an origin message, written or not."""
+        return await self.get_clones_of_many([origin_message_id])
+
+    async def get_clones_of_many(
+        self, origin_message_ids: Sequence[int]
+    ) -> list[CrossOverClone]:
+        """Get every mapping of many origin messages, in a single query."""
+        rows = await CrossChatMessage.prisma().find_many(
+            where={"OriginMessageId": {"in": [*origin_message_ids]}}
+        )
+
+        clones = [
+            CrossOverClone(
+                member_id=x.MemberId,
+                origin_message_id=x.OriginMessageId,
+                cloned_message_id=x.ClonedMessageId,
+                webhook_id=x.WebhookId,
+            )
+            for x in rows
+            if x.MemberId is not None
+        ]
+
+        for origin_message_id in origin_message_ids:
+            clones.extend(self.get_pending(origin_message_id))
+
+        return clones
+
+    def get_pending(self, origin_message_id: int) -> list[CrossOverClone]:
+        """Get mappings of an origin message which are not written yet."""
+        return [
+            *self._writing.get(origin_message_id, []),
+            *self.pending.get(origin_message_id, []),
+        ]
+
+    async def flush(self) -> None:
+        """Write every queued mapping."""
+        async with self._lock:
+            if not self.pending:
+                return
+
+            self._writing, self.pending = self.pending, {}
+            self.pending_count = 0
+
+            clones = [x for group in self._writing.values() for x in group]
+
+            try:
+                await CrossChatMessage.prisma().create_many(
+                    data=[self._to_data(x) for x in clones]
+                )
+            except Exception as ex:
+                logging.warning(
+                    "Batched write failed, retrying one by one.", exc_info=ex
+                )
+
+                # Most likely a member left its room in the meantime,
+                # so only mappings pointing to it should be lost.
+                for x in clones:
+                    try:
+                        await CrossChatMessage.prisma().create(data=self._to_data(x))
+                    except Exception as ex:
+                        logging.error("Dropping relayed message %s.", x, exc_info=ex)
+            finally:
+                self._writing = {}
+
+    async def close(self) -> None:
+        """Stop the flush timer and write everything left."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        await self.flush()
+
+    def _to_data(
+        self, clone: CrossOverClone
+    ) -> CrossChatMessageCreateWithoutRelationsInput:
+        """Convert a mapping into its database row."""
+        return {
+            "MemberId": clone.member_id,
+            "OriginMessageId": clone.origin_message_id,
+            "ClonedMessageId": clone.cloned_message_id,
+            "WebhookId": clone.webhook_id,
+        }
+
+    def _schedule_flush(self, delay: float) -> None:
+        """Flush after `delay` seconds, replacing the pending timer."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+
+        self._flush_task = asyncio.create_task(self._flush_later(delay))
+
+    async def _flush_later(self, delay: float) -> None:
+        """Flush timer body."""
+        await asyncio.sleep(delay)
+
+        self._flush_task = None
+        await self.flush()
+
+
+crossover_messages = CrossOverMessageBuffer()
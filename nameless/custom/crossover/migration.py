@@ -0,0 +1,64 @@
+import logging
+
+from prisma.models import CrossChatConnection, CrossChatMessage
+
+from nameless.custom.prisma import NamelessPrisma
+
+__all__ = ["CrossOverMigration"]
+
+
+class CrossOverMigration:
+    """Data migrations of the crossover tables."""
+
+    @staticmethod
+    async def migrate_connections() -> int:
+        """
+        Turn pairwise connections into room members, returning how many.
+
+        Both ends of every connection become members of its room, relayed
+        message mappings are pointed at the member they were cloned to,
+        and the connection goes away. Every step is idempotent, so an
+        interrupted migration is simply done again on the next startup.
+        """
+        connections = await CrossChatConnection.prisma().find_many()
+
+        if not connections:
+            return 0
+
+        logging.warning(
+            "Migrating %d crossover connection(s) into room members.",
+            len(connections),
+        )
+
+        members: dict[tuple[str, int, int], str] = {}
+
+        async def get_member_id(room_id: str, guild_id: int, channel_id: int) -> str:
+            key = (room_id, guild_id, channel_id)
+
+            if key not in members:
+                member = await NamelessPrisma.get_room_member_entry(*key)
+                members[key] = member.Id
+
+            return members[key]
+
+        for conn in connections:
+            if conn.SourceGuildId is not None:
+                await get_member_id(
+                    conn.RoomId, conn.SourceGuildId, conn.SourceChannelId
+                )
+
+            target_id = await get_member_id(
+                conn.RoomId, conn.TargetGuildId, conn.TargetChannelId
+            )
+
+            await CrossChatMessage.prisma().update_many(
+                where={"ConnectionId": conn.Id},
+                data={"MemberId": target_id, "ConnectionId": None},
+            )
+
+        await CrossChatConnection.prisma().delete_many(
+            where={"Id": {"in": [x.Id for x in connections]}}
+        )
+
+        logging.warning("Migrated into %d crossover room member(s).", len(members))
+        return len(connections)
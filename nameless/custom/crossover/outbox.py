@@ -0,0 +1,246 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Final
+
+import discord
+from prisma.models import CrossChatOutbox
+
+from nameless.custom.crossover.snapshot import CrossOverSnapshot
+
+__all__ = ["CrossOverOutbox", "crossover_outbox"]
+
+_OutboxRelay = Callable[[CrossOverSnapshot, set[str]], Awaitable[bool]]
+"""
+A coroutine relaying a snapshot to every room member not in the given set.
+
+Members delivered to, or given up on, are added to the set.
+
+Returns
+-------
+`bool`
+    Whether the relay is complete, `False` schedules a retry.
+"""
+
+_OutboxReady = Callable[[], Awaitable[None]]
+"""A coroutine waiting until targets can be resolved, e.g. `wait_until_ready`."""
+
+
+@dataclass(slots=True)
+class _OutboxJob:
+    """A queued relay, mirroring its outbox row."""
+
+    id: int
+    snapshot: CrossOverSnapshot
+    delivered: set[str]
+    attempts: int
+    created_at: datetime
+
+
+class CrossOverOutbox:
+    """
+    Durable queue of messages waiting to be relayed.
+
+    Messages are written to the database before being relayed, and only
+    removed once every target got them, so relays survive restarts.
+    Every source channel with queued messages gets its own worker,
+    started on demand and retired once the channel is drained, so a
+    burst or a slow target in one room never stalls another. Failed
+    relays are retried with exponential backoff, skipping the targets
+    which already got the message, and hold back the messages queued
+    after them in the same channel, which keeps the order of each room.
+    """
+
+    _MAX_ATTEMPTS: Final[int] = 5
+    _BASE_BACKOFF: Final[float] = 2.0
+    _MAX_BACKOFF: Final[float] = 60.0
+
+    def __init__(self):
+        self.jobs: dict[int, _OutboxJob] = {}
+        self.relayed_count: int = 0
+        self.retried_count: int = 0
+        self.dropped_count: int = 0
+        self._relay: _OutboxRelay | None = None
+        self._ready: _OutboxReady | None = None
+        self._loading: asyncio.Lock = asyncio.Lock()
+        self._resumed_up_to: int = 0
+        self._lanes: dict[int, deque[_OutboxJob]] = {}
+        self._workers: dict[int, asyncio.Task[None]] = {}
+
+    @property
+    def depth(self) -> int:
+        """Number of messages not fully relayed yet, retries included."""
+        return len(self.jobs)
+
+    @property
+    def oldest_age(self) -> float:
+        """Age of the oldest message not fully relayed yet, in seconds."""
+        # Jobs are inserted in outbox order, so the first one is the oldest.
+        oldest = next(iter(self.jobs.values()), None)
+
+        if oldest is None:
+            return 0.0
+
+        return (discord.utils.utcnow() - oldest.created_at).total_seconds()
+
+    def is_queued(self, message_id: int) -> bool:
+        """Check if a message is still waiting to be relayed, or being relayed."""
+        return any(x.snapshot.message_id == message_id for x in self.jobs.values())
+
+    async def start(self, relay: _OutboxRelay, ready: _OutboxReady) -> None:
+        """Start the workers, resuming whatever was left in the outbox."""
+        # Messages persisted meanwhile are queued after the resumed ones.
+        async with self._loading:
+            rows = await CrossChatOutbox.prisma().find_many(order={"Id": "asc"})
+
+            self._relay = relay
+            self._ready = ready
+            self._resumed_up_to = rows[-1].Id if rows else 0
+
+            for row in rows:
+                self._put(self._to_job(row))
+
+        if rows:
+            logging.info("Resuming %d queued crossover relay(s).", len(rows))
+
+    async def stop(self) -> None:
+        """Stop the workers, queued messages stay in the outbox."""
+        self._relay = None
+        self._ready = None
+        workers = [*self._workers.values()]
+
+        for worker in workers:
+            worker.cancel()
+
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        self.jobs.clear()
+        self._lanes.clear()
+        self._workers.clear()
+
+    async def enqueue(self, snapshot: CrossOverSnapshot) -> None:
+        """Persist a message, then queue it for relaying."""
+        row = await CrossChatOutbox.prisma().create(
+            data={"SourceChannelId": snapshot.channel_id, "Payload": snapshot.to_json()}
+        )
+
+        async with self._loading:
+            # Not started yet, it will be picked up on start. Or it was
+            # just resumed, and might even be relayed already.
+            if self._relay is not None and row.Id > self._resumed_up_to:
+                self._put(self._to_job(row))
+
+    def _to_job(self, row: CrossChatOutbox) -> _OutboxJob:
+        """Convert an outbox row into a job."""
+        return _OutboxJob(
+            id=row.Id,
+            snapshot=CrossOverSnapshot.from_json(row.Payload),
+            delivered=set(json.loads(row.Delivered)),
+            attempts=row.Attempts,
+            created_at=row.CreatedAt,
+        )
+
+    def _put(self, job: _OutboxJob) -> None:
+        """Queue a job on its source channel, starting a worker if needed."""
+        channel_id = job.snapshot.channel_id
+
+        # Already resumed from the outbox table.
+        if job.id in self.jobs:
+            return
+
+        self.jobs[job.id] = job
+        self._lanes.setdefault(channel_id, deque()).append(job)
+
+        if channel_id not in self._workers:
+            self._workers[channel_id] = asyncio.create_task(self._work(channel_id))
+
+    async def _work(self, channel_id: int) -> None:
+        """Worker body, relaying jobs of one source channel in order."""
+        lane = self._lanes[channel_id]
+
+        try:
+            # Before that, no target resolves, and every job would look done.
+            assert self._ready is not None
+            await self._ready()
+
+            while lane:
+                # Left at the head until settled, so a retry goes first.
+                job = lane[0]
+
+                try:
+                    delay = await self._run(job)
+                except Exception as ex:
+                    # Still in the outbox table, resumed on the next start.
+                    logging.error("Crossover outbox worker failed.", exc_info=ex)
+                    self.jobs.pop(job.id, None)
+                    delay = None
+
+                if delay is None:
+                    lane.popleft()
+                else:
+                    await asyncio.sleep(delay)
+        finally:
+            # Drained, a new message of this channel starts another worker.
+            if self._lanes.get(channel_id) is lane:
+                del self._lanes[channel_id]
+                del self._workers[channel_id]
+
+    async def _run(self, job: _OutboxJob) -> float | None:
+        """
+        Relay a job once, then settle it.
+
+        Returns
+        -------
+        `float | None`
+            Seconds to wait before retrying, `None` if the job is settled.
+        """
+        assert self._relay is not None
+
+        try:
+            done = await self._relay(job.snapshot, job.delivered)
+        except Exception as ex:
+            logging.warning(
+                "Relay of message %s failed.", job.snapshot.message_id, exc_info=ex
+            )
+            done = False
+
+        if done:
+            self.relayed_count += 1
+            await self._finish(job)
+            return None
+
+        job.attempts += 1
+
+        if job.attempts >= self._MAX_ATTEMPTS:
+            logging.error(
+                "Dropping relay of message %s after %d attempts.",
+                job.snapshot.message_id,
+                job.attempts,
+            )
+            self.dropped_count += 1
+            await self._finish(job)
+            return None
+
+        self.retried_count += 1
+
+        await CrossChatOutbox.prisma().update(
+            where={"Id": job.id},
+            data={
+                "Attempts": job.attempts,
+                "Delivered": json.dumps(sorted(job.delivered)),
+            },
+        )
+
+        return min(self._BASE_BACKOFF * 2 ** (job.attempts - 1), self._MAX_BACKOFF)
+
+    async def _finish(self, job: _OutboxJob) -> None:
+        """Remove a settled job."""
+        del self.jobs[job.id]
+        await CrossChatOutbox.prisma().delete_many(where={"Id": job.id})
+
+
+crossover_outbox = CrossOverOutbox()
@@ -0,0 +1,154 @@
+import json
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Self
+
+import discord
+from discord.http import HTTPClient, Route
+from discord.utils import MISSING
+
+from nameless.custom.crossover.snapshot import CrossOverSnapshot
+
+__all__ = ["CrossOverPayload"]
+
+
+def _create_webhook_username(snapshot: CrossOverSnapshot) -> str:
+    """Create relay webhook username, which Discord has a few rules about."""
+    username = f"{snapshot.author_display_name} @ {snapshot.guild_name}"
+
+    # Webhook usernames must not contain these words.
+    for word in ("discord", "clyde"):
+        username = re.sub(
+            word, lambda m: f"{m[0][0]}\u200b{m[0][1:]}", username, flags=re.I
+        )
+
+    return username[:80]
+
+
+def _create_webhook_body(content: str) -> tuple[str, list[discord.Embed]]:
+    """Create relay webhook message body, long messages go in an embed."""
+    if len(content) <= 2000:
+        return content, []
+
+    return "", [discord.Embed(description=content, color=discord.Colour.orange())]
+
+
+def _render_embed(snapshot: CrossOverSnapshot) -> discord.Embed:
+    """Render the relay embed of a message."""
+    embed = discord.Embed(description=snapshot.content, color=discord.Colour.orange())
+
+    embed.set_author(
+        name=f"@{snapshot.author_global_name} wrote:",
+        icon_url=snapshot.author_avatar_url,
+    )
+    embed.set_footer(
+        text=f"{snapshot.guild_name} at #{snapshot.channel_name}",
+        icon_url=snapshot.guild_icon_url,
+    )
+
+    return embed
+
+
+@dataclass(frozen=True, slots=True)
+class CrossOverPayload:
+    """
+    Relay bodies of a message, rendered once and shared by every target.
+
+    The body of nameless* own messages is serialized up front, so sending
+    it to another target only costs a multipart form around the same
+    string. Webhook sends go through discord.py, which takes objects, so
+    those share the rendered objects instead.
+    """
+
+    embed: discord.Embed
+    embed_json: str
+    webhook_username: str
+    webhook_avatar_url: str
+    webhook_content: str
+    webhook_embeds: tuple[discord.Embed, ...]
+
+    @classmethod
+    def render(cls, snapshot: CrossOverSnapshot) -> Self:
+        """Render every relay body of a message."""
+        embed = _render_embed(snapshot)
+
+        body: dict[str, object] = {
+            "embeds": [embed.to_dict()],
+            "sticker_ids": [str(x) for x in snapshot.sticker_ids],
+            "attachments": [
+                {
+                    "id": index,
+                    "filename": (
+                        f"SPOILER_{x.filename}"
+                        if x.spoiler and not x.filename.startswith("SPOILER_")
+                        else x.filename
+                    ),
+                    **({"description": x.description} if x.description else {}),
+                }
+                for index, x in enumerate(snapshot.attachments)
+            ],
+        }
+
+        webhook_content, webhook_embeds = _create_webhook_body(snapshot.content)
+
+        return cls(
+            embed=embed,
+            embed_json=json.dumps(body, separators=(",", ":")),
+            webhook_username=_create_webhook_username(snapshot),
+            webhook_avatar_url=snapshot.author_display_avatar_url,
+            webhook_content=webhook_content,
+            webhook_embeds=tuple(webhook_embeds),
+        )
+
+    def to_form(self, files: Sequence[discord.File]) -> list[dict[str, object]]:
+        """Create the multipart form of one embed relay."""
+        return [
+            {"name": "payload_json", "value": self.embed_json},
+            *(
+                {
+                    "name": f"files[{index}]",
+                    "value": x.fp,
+                    "filename": x.filename,
+                    "content_type": "application/octet-stream",
+                }
+                for index, x in enumerate(files)
+            ),
+        ]
+
+    async def send_as_bot(
+        self, http: HTTPClient, channel_id: int, files: list[discord.File]
+    ) -> int:
+        """Send as nameless* own message, returning its ID."""
+        # Same as `channel.send`, minus serializing the body again.
+        try:
+            data = await http.request(
+                Route("POST", "/channels/{channel_id}/messages", channel_id=channel_id),
+                files=files,
+                form=self.to_form(files),
+            )
+        finally:
+            for f in files:
+                f.close()
+
+        return int(data["id"])
+
+    async def send_as_webhook(
+        self,
+        webhook: discord.Webhook,
+        files: list[discord.File],
+        thread: discord.abc.Snowflake = MISSING,
+    ) -> int:
+        """Send through a relay webhook, returning the message ID."""
+        sent_message = await webhook.send(
+            content=self.webhook_content,
+            embeds=[*self.webhook_embeds],
+            username=self.webhook_username,
+            avatar_url=self.webhook_avatar_url,
+            files=files,
+            allowed_mentions=discord.AllowedMentions.none(),
+            thread=thread,
+            wait=True,
+        )
+
+        return sent_message.id
@@ -0,0 +1,307 @@
+import asyncio
+import atexit
+import dataclasses
+import logging
+import multiprocessing
+import time
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Final
+
+import discord
+from discord.utils import MISSING
+
+from nameless.custom.crossover.attachments import CrossOverAttachments
+from nameless.custom.crossover.payload import CrossOverPayload
+from nameless.custom.crossover.routing import CrossOverTarget
+from nameless.custom.crossover.scheduler import (
+    CrossOverCircuitOpen,
+    CrossOverFanOutResult,
+    crossover_fanout,
+)
+from nameless.custom.crossover.snapshot import CrossOverSnapshot
+from nameless.custom.crossover.webhooks import crossover_webhooks
+
+__all__ = [
+    "CrossOverRemoteTarget",
+    "CrossOverRemoteError",
+    "CrossOverProcessPool",
+    "crossover_processes",
+]
+
+_SEND_TIMEOUT: Final[float] = 30.0
+
+
+@dataclass(frozen=True, slots=True)
+class CrossOverRemoteTarget:
+    """A relay target, with everything a worker process needs to send to it."""
+
+    member_id: str
+    channel_id: int
+    webhook_owner_id: int | None = None
+    webhook: tuple[int, str] | None = None
+
+    @property
+    def thread(self) -> discord.abc.Snowflake:
+        """Get `thread` argument for webhook operations."""
+        if self.webhook_owner_id in (None, self.channel_id):
+            return MISSING
+
+        return discord.Object(self.channel_id)
+
+
+@dataclass(frozen=True, slots=True)
+class _RemoteJob:
+    """One message to relay, as sent to a worker process."""
+
+    snapshot: CrossOverSnapshot
+    targets: tuple[CrossOverRemoteTarget, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class _RemoteOutcome:
+    """Outcome of one target, as sent back from a worker process."""
+
+    member_id: str
+    cloned_id: int | None
+    latency: float
+    webhook_id: int | None = None
+    status: int = 0
+    error: str = ""
+    webhook_gone: bool = False
+
+
+class CrossOverRemoteError(Exception):
+    """A relay send failed in a worker process."""
+
+    def __init__(self, status: int, error: str):
+        super().__init__(error)
+        self.status: int = status
+
+    @property
+    def permanent(self) -> bool:
+        """Whether retrying is pointless, like a `Forbidden` or `NotFound`."""
+        return self.status in (403, 404)
+
+
+# Per worker process, set up once by `_init_worker`.
+_worker_loop: asyncio.AbstractEventLoop | None = None
+_worker_client: discord.Client | None = None
+
+
+def _init_worker(token: str) -> None:
+    """Log a REST-only client in, on a loop kept for the process lifetime."""
+    global _worker_loop, _worker_client
+
+    discord.utils.setup_logging()
+
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+
+    # Never connects to the gateway, `login` only sets up HTTP.
+    _worker_client = discord.Client(intents=discord.Intents.none())
+    _worker_loop.run_until_complete(_worker_client.login(token))
+
+    atexit.register(_close_worker)
+
+
+def _close_worker() -> None:
+    """Close the download session, when the pool shuts the process down."""
+    assert _worker_loop is not None
+
+    _worker_loop.run_until_complete(CrossOverAttachments.close_session())
+
+
+def _run_job(job: _RemoteJob) -> list[_RemoteOutcome]:
+    """Relay a message to every target of the job, in a worker process."""
+    assert _worker_loop is not None
+    assert _worker_client is not None
+
+    try:
+        return _worker_loop.run_until_complete(_relay(_worker_client, job))
+    except Exception as ex:
+        # Not every exception survives pickling, aiohttp ones in particular.
+        raise RuntimeError(repr(ex)) from None
+
+
+async def _relay(client: discord.Client, job: _RemoteJob) -> list[_RemoteOutcome]:
+    """Render and download once, then send to every target concurrently."""
+    started_at = time.perf_counter()
+
+    async with CrossOverAttachments(job.snapshot.attachments) as attachments:
+        payload = CrossOverPayload.render(
+            dataclasses.replace(job.snapshot, attachments=attachments.available)
+        )
+
+        return await asyncio.gather(
+            *[_send(client, payload, attachments, x, started_at) for x in job.targets]
+        )
+
+
+async def _send(
+    client: discord.Client,
+    payload: CrossOverPayload,
+    attachments: CrossOverAttachments,
+    target: CrossOverRemoteTarget,
+    started_at: float,
+) -> _RemoteOutcome:
+    """Relay to a single target, never raising."""
+    webhook_gone = False
+    webhook_id: int | None = None
+
+    try:
+        async with asyncio.timeout(_SEND_TIMEOUT):
+            if target.webhook is not None:
+                webhook = discord.Webhook.partial(*target.webhook, client=client)
+
+                try:
+                    cloned_id = await payload.send_as_webhook(
+                        webhook, attachments.to_files(), target.thread
+                    )
+                    webhook_id = webhook.id
+                except discord.NotFound:
+                    # Creating another one is up to the main process.
+                    webhook_gone = True
+                    cloned_id = await payload.send_as_bot(
+                        client.http, target.channel_id, attachments.to_files()
+                    )
+            else:
+                cloned_id = await payload.send_as_bot(
+                    client.http, target.channel_id, attachments.to_files()
+                )
+    except Exception as ex:
+        # Anything else still fails only this target, e.g. aiohttp giving up.
+        return _RemoteOutcome(
+            member_id=target.member_id,
+            cloned_id=None,
+            latency=time.perf_counter() - started_at,
+            status=ex.status if isinstance(ex, discord.HTTPException) else 0,
+            error=repr(ex),
+            webhook_gone=webhook_gone,
+        )
+
+    return _RemoteOutcome(
+        member_id=target.member_id,
+        cloned_id=cloned_id,
+        latency=time.perf_counter() - started_at,
+        webhook_id=webhook_id,
+        webhook_gone=webhook_gone,
+    )
+
+
+class CrossOverProcessPool:
+    """
+    Relay worker processes, for when one core cannot keep up.
+
+    Every worker logs in its own REST-only client, so the gateway, the
+    database and all bookkeeping stay in the main process, which only
+    ships snapshots out and gets cloned message IDs back. Workers keep
+    their own rate limit buckets, which Discord still enforces per
+    token, so 429s get more likely the more workers there are.
+
+    The outbox runs one job per busy source channel at a time, so the
+    pool is only ever as busy as the number of rooms relaying at once,
+    each worker process taking one job at a time.
+    """
+
+    def __init__(self):
+        self._executor: ProcessPoolExecutor | None = None
+        self._token: str = ""
+        self._processes: int = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether relays go through worker processes."""
+        return self._executor is not None
+
+    def start(self, token: str, processes: int) -> None:
+        """Start the worker processes."""
+        if self._executor is not None:
+            return
+
+        logging.info("Starting %d crossover relay process(es).", processes)
+
+        self._token = token
+        self._processes = processes
+
+        # Forking a process with a running event loop is asking for trouble.
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(token,),
+        )
+
+    async def stop(self) -> None:
+        """Stop the worker processes, dropping queued work."""
+        if self._executor is None:
+            return
+
+        executor = self._executor
+        self._executor = None
+
+        await asyncio.to_thread(executor.shutdown, cancel_futures=True)
+
+    async def dispatch(
+        self,
+        snapshot: CrossOverSnapshot,
+        targets: Iterable[tuple[CrossOverTarget, CrossOverRemoteTarget]],
+    ) -> CrossOverFanOutResult:
+        """Relay a message to every target through a worker process."""
+        assert self._executor is not None
+
+        result = CrossOverFanOutResult()
+        sendable: dict[str, tuple[CrossOverTarget, CrossOverRemoteTarget]] = {}
+
+        for target, remote_target in targets:
+            stats = crossover_fanout.get_stats(target.channel_id)
+
+            if stats.is_open:
+                stats.skipped += 1
+                result.failed.append((target, CrossOverCircuitOpen(target.channel_id)))
+                continue
+
+            sendable[target.member_id] = (target, remote_target)
+
+        if not sendable:
+            return result
+
+        try:
+            outcomes = await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                _run_job,
+                _RemoteJob(
+                    snapshot=snapshot, targets=tuple(x for _, x in sendable.values())
+                ),
+            )
+        except BrokenProcessPool:
+            # A worker died, replace the pool so the retry has somewhere to go.
+            logging.error("Crossover relay process pool broke, restarting it.")
+            self._executor = None
+            self.start(self._token, self._processes)
+            raise
+
+        for outcome in outcomes:
+            target, remote_target = sendable[outcome.member_id]
+
+            if outcome.webhook_gone and remote_target.webhook_owner_id is not None:
+                await crossover_webhooks.discard_by_id(remote_target.webhook_owner_id)
+
+            if outcome.cloned_id is None:
+                logging.warning(
+                    "Relay to channel %s failed: %s.", target.channel_id, outcome.error
+                )
+                crossover_fanout.record_failure(target)
+                result.failed.append(
+                    (target, CrossOverRemoteError(outcome.status, outcome.error))
+                )
+            else:
+                crossover_fanout.get_stats(target.channel_id).record(outcome.latency)
+                result.relayed.append((target, outcome.cloned_id, outcome.webhook_id))
+
+        return result
+
+
+crossover_processes = CrossOverProcessPool()
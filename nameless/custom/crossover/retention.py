@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Final
+
+import discord
+from prisma.models import CrossChatMember, CrossChatMessage
+from prisma.types import CrossChatMessageWhereInput
+
+from nameless.config import nameless_config
+from nameless.custom.prisma import NamelessPrisma
+
+__all__ = ["CrossOverRetention", "crossover_retention"]
+
+
+class CrossOverRetention:
+    """
+    Background pruning of relayed message mappings.
+
+    Mappings older than `message_retention_days`, beyond the latest
+    `message_retention_count` of a room member, or left without a member
+    are deleted in small batches, yielding between them so nothing holds
+    the write lock for long. Every run ends with `PRAGMA optimize`, and
+    every few runs with a `VACUUM` to give the space back.
+    """
+
+    _INTERVAL: Final[float] = 60 * 60.0
+    _BATCH_SIZE: Final[int] = 500
+    _BATCH_PAUSE: Final[float] = 0.1
+    _VACUUM_EVERY: Final[int] = 24
+
+    def __init__(self):
+        self.deleted_count: int = 0
+        self._runs: int = 0
+        self._deleted_since_vacuum: int = 0
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start the background job."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        """Stop the background job."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def run(self) -> int:
+        """Prune every expired mapping, returning how many were deleted."""
+        deleted = await self._prune_orphans()
+        deleted += await self._prune_by_age()
+        deleted += await self._prune_by_count()
+
+        self.deleted_count += deleted
+        self._deleted_since_vacuum += deleted
+        self._runs += 1
+
+        await NamelessPrisma.optimize()
+
+        if self._runs % self._VACUUM_EVERY == 0 and self._deleted_since_vacuum:
+            await NamelessPrisma.vacuum()
+            self._deleted_since_vacuum = 0
+
+        return deleted
+
+    async def _run_forever(self) -> None:
+        """Background job body."""
+        while True:
+            try:
+                deleted = await self.run()
+            except Exception as ex:
+                logging.error("Crossover retention run failed.", exc_info=ex)
+            else:
+                if deleted:
+                    logging.info("Pruned %d relayed message mapping(s).", deleted)
+
+            await asyncio.sleep(self._INTERVAL)
+
+    async def _prune_orphans(self) -> int:
+        """Delete mappings whose room member is gone."""
+        return await self._delete_batches({"MemberId": None})
+
+    async def _prune_by_age(self) -> int:
+        """Delete mappings older than the retention period."""
+        days: int = nameless_config["crossover"]["message_retention_days"]
+
+        if days <= 0:
+            return 0
+
+        # Snowflakes embed their creation time, so the cutoff is an ID
+        # range on an indexed column instead of a date column.
+        cutoff = discord.utils.time_snowflake(
+            discord.utils.utcnow() - timedelta(days=days)
+        )
+
+        return await self._delete_batches({"OriginMessageId": {"lt": cutoff}})
+
+    async def _prune_by_count(self) -> int:
+        """Delete mappings beyond the latest few of every room member."""
+        count: int = nameless_config["crossover"]["message_retention_count"]
+
+        if count <= 0:
+            return 0
+
+        deleted = 0
+
+        for member in await CrossChatMember.prisma().find_many():
+            while True:
+                rows = await CrossChatMessage.prisma().find_many(
+                    where={"MemberId": member.Id},
+                    order={"OriginMessageId": "desc"},
+                    skip=count,
+                    take=self._BATCH_SIZE,
+                )
+
+                if not rows:
+                    break
+
+                deleted += await CrossChatMessage.prisma().delete_many(
+                    where={"Id": {"in": [x.Id for x in rows]}}
+                )
+
+                await asyncio.sleep(self._BATCH_PAUSE)
+
+        return deleted
+
+    async def _delete_batches(self, where: CrossChatMessageWhereInput) -> int:
+        """Delete matching mappings, a batch at a time."""
+        deleted = 0
+
+        while True:
+            rows = await CrossChatMessage.prisma().find_many(
+                where=where, take=self._BATCH_SIZE
+            )
+
+            if not rows:
+                return deleted
+
+            deleted += await CrossChatMessage.prisma().delete_many(
+                where={"Id": {"in": [x.Id for x in rows]}}
+            )
+
+            await asyncio.sleep(self._BATCH_PAUSE)
+
+
+crossover_retention = CrossOverRetention()
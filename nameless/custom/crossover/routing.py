@@ -0,0 +1,170 @@
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import discord
+from prisma.models import CrossChatMember
+
+from nameless.custom.types import NamelessTextable
+
+__all__ = ["CrossOverTarget", "CrossOverRoutingTable", "crossover_routes"]
+
+
+@dataclass(frozen=True, slots=True)
+class CrossOverTarget:
+    """A member channel of a crossover room, as a relay destination."""
+
+    member_id: str
+    room_id: str
+    guild_id: int
+    channel_id: int
+
+    @property
+    def key(self) -> tuple[int, int]:
+        """(guild, channel) of this member."""
+        return self.guild_id, self.channel_id
+
+    def resolve(self, client: discord.Client) -> NamelessTextable | None:
+        """Resolve this target from gateway cache, if still reachable."""
+        guild = client.get_guild(self.guild_id)
+
+        if guild is None:
+            return None
+
+        channel = guild.get_channel_or_thread(self.channel_id)
+
+        if not isinstance(channel, NamelessTextable):
+            return None
+
+        return channel
+
+
+_MemberPredicate = Callable[[CrossOverTarget], bool]
+
+
+class CrossOverRoutingTable:
+    """
+    In-memory index of crossover room memberships.
+
+    A room is a topic, every member hears every other member, so relay
+    targets of a channel are computed from the members of its rooms
+    instead of being stored per pair of channels.
+    """
+
+    def __init__(self):
+        self.rooms: dict[str, tuple[CrossOverTarget, ...]] = {}
+        self.channel_rooms: dict[tuple[int, int], tuple[str, ...]] = {}
+
+    async def populate_from_database(self) -> None:
+        """Load every crossover room member into memory."""
+        logging.info("Loading crossover rooms.")
+
+        self.rooms.clear()
+        self.channel_rooms.clear()
+
+        for member in await CrossChatMember.prisma().find_many():
+            self.add_member(member)
+
+        logging.info("Loaded %d crossover room(s).", len(self.rooms))
+
+    def get_targets(
+        self, guild_id: int, channel_id: int
+    ) -> tuple[CrossOverTarget, ...]:
+        """Get relay targets of a (guild, channel)."""
+        key = (guild_id, channel_id)
+        room_ids = self.channel_rooms.get(key, ())
+
+        # The common case, no need to dedupe anything.
+        if len(room_ids) == 1:
+            return tuple(x for x in self.rooms[room_ids[0]] if x.key != key)
+
+        targets: dict[tuple[int, int], CrossOverTarget] = {}
+
+        for room_id in room_ids:
+            for member in self.rooms[room_id]:
+                if member.key != key:
+                    targets.setdefault(member.key, member)
+
+        return tuple(targets.values())
+
+    def get_member(
+        self, room_id: str, guild_id: int, channel_id: int
+    ) -> CrossOverTarget | None:
+        """Get the membership of a (guild, channel) in a room."""
+        for member in self.rooms.get(room_id, ()):
+            if member.key == (guild_id, channel_id):
+                return member
+
+        return None
+
+    def is_relayed(self, guild_id: int, channel_id: int) -> bool:
+        """Check if a (guild, channel) relays to anywhere."""
+        return any(
+            len(self.rooms[x]) > 1
+            for x in self.channel_rooms.get((guild_id, channel_id), ())
+        )
+
+    def add_member(self, member: CrossChatMember) -> None:
+        """Add a room member from its entry."""
+        target = CrossOverTarget(
+            member_id=member.Id,
+            room_id=member.RoomId,
+            guild_id=member.GuildId,
+            channel_id=member.ChannelId,
+        )
+
+        if self.get_member(target.room_id, *target.key) is not None:
+            return
+
+        # Tuples are swapped instead of mutated, so a relay iterating
+        # over an old one is never affected by a concurrent update.
+        self.rooms[target.room_id] = (*self.rooms.get(target.room_id, ()), target)
+        self.channel_rooms[target.key] = (
+            *self.channel_rooms.get(target.key, ()),
+            target.room_id,
+        )
+
+    def remove_member(self, member_id: str) -> None:
+        """Remove a single room member."""
+        self._remove_where(lambda x: x.member_id == member_id)
+
+    def remove_room(self, room_id: str) -> None:
+        """Remove every member of a room."""
+        self._remove_where(lambda x: x.room_id == room_id)
+
+    def remove_guild(self, guild_id: int) -> None:
+        """Remove every member channel of a guild."""
+        self._remove_where(lambda x: x.guild_id == guild_id)
+
+    def remove_channel(self, channel_id: int) -> None:
+        """Remove every membership of a channel."""
+        self._remove_where(lambda x: x.channel_id == channel_id)
+
+    def _remove_where(self, predicate: _MemberPredicate) -> None:
+        """Remove members matching `predicate`, dropping emptied rooms."""
+        for room_id, members in [*self.rooms.items()]:
+            kept = tuple(x for x in members if not predicate(x))
+
+            if len(kept) == len(members):
+                continue
+
+            if kept:
+                self.rooms[room_id] = kept
+            else:
+                del self.rooms[room_id]
+
+            for member in members:
+                if member in kept:
+                    continue
+
+                room_ids = tuple(
+                    x for x in self.channel_rooms.get(member.key, ()) if x != room_id
+                )
+
+                if room_ids:
+                    self.channel_rooms[member.key] = room_ids
+                else:
+                    self.channel_rooms.pop(member.key, None)
+
+
+crossover_routes = CrossOverRoutingTable()
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Final
+
+import discord
+
+from nameless.custom.crossover.routing import CrossOverTarget
+from nameless.custom.types import NamelessTextable
+
+__all__ = [
+    "CrossOverCircuitOpen",
+    "CrossOverTargetStats",
+    "CrossOverFanOutResult",
+    "CrossOverFanOut",
+    "crossover_fanout",
+]
+
+_RelaySender = Callable[
+    [CrossOverTarget, NamelessTextable], Awaitable[tuple[int, int | None]]
+]
+"""
+A coroutine relaying one message to one target.
+
+Returns
+-------
+`tuple[int, int | None]`
+    The ID of the cloned message, and of the webhook it was sent through.
+"""
+
+
+class CrossOverCircuitOpen(Exception):
+    """Relays to a target channel are paused after repeated failures."""
+
+
+@dataclass(slots=True)
+class CrossOverTargetStats:
+    """Delivery counters and circuit breaker of a relay target channel."""
+
+    sent: int = 0
+    failed: int = 0
+    skipped: int = 0
+    total_latency: float = 0.0
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+    consecutive_failures: int = 0
+    cooldown: float = 0.0
+    open_until: float = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether relays to this target are paused."""
+        return time.monotonic() < self.open_until
+
+    @property
+    def average_latency(self) -> float:
+        """Average delivery latency, in seconds."""
+        return self.total_latency / self.sent if self.sent else 0.0
+
+    def record(self, latency: float) -> None:
+        """Record a successful delivery."""
+        self.sent += 1
+        self.total_latency += latency
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.consecutive_failures = 0
+        self.cooldown = 0.0
+
+
+@dataclass(slots=True)
+class CrossOverFanOutResult:
+    """Outcome of relaying one message to many targets."""
+
+    relayed: list[tuple[CrossOverTarget, int, int | None]] = field(default_factory=list)
+    failed: list[tuple[CrossOverTarget, Exception]] = field(default_factory=list)
+
+
+class CrossOverFanOut:
+    """
+    Concurrent relay dispatcher.
+
+    discord.py already waits on the per-route and global rate limits,
+    this only makes sure we do not pile work onto them: sends to the
+    same channel run one at a time (which also keeps relay order), the
+    total of in-flight sends is capped, and a send stuck behind a long
+    429 is abandoned instead of holding the rest of the relay.
+
+    A target failing too many times in a row is skipped for a cooldown,
+    doubled on every failed probe after it, so a channel we lost access
+    to stops costing a request on every relay.
+    """
+
+    _MAX_IN_FLIGHT: Final[int] = 16
+    _SEND_TIMEOUT: Final[float] = 30.0
+    _BREAKER_THRESHOLD: Final[int] = 5
+    _BREAKER_COOLDOWN: Final[float] = 60.0
+    _BREAKER_MAX_COOLDOWN: Final[float] = 30 * 60.0
+
+    def __init__(self):
+        self.stats: dict[int, CrossOverTargetStats] = {}
+        self._in_flight: asyncio.Semaphore = asyncio.Semaphore(self._MAX_IN_FLIGHT)
+        self._channel_locks: dict[int, asyncio.Lock] = {}
+
+    async def dispatch(
+        self,
+        targets: Iterable[tuple[CrossOverTarget, NamelessTextable]],
+        send: _RelaySender,
+    ) -> CrossOverFanOutResult:
+        """Relay to every target concurrently, never raising."""
+        started_at = time.perf_counter()
+
+        results = await asyncio.gather(
+            *[
+                self._send(target, channel, send, started_at)
+                for target, channel in targets
+            ]
+        )
+
+        result = CrossOverFanOutResult()
+
+        for target, outcome in results:
+            if isinstance(outcome, Exception):
+                result.failed.append((target, outcome))
+            else:
+                result.relayed.append((target, *outcome))
+
+        return result
+
+    def get_stats(self, channel_id: int) -> CrossOverTargetStats:
+        """Get delivery counters of a target channel."""
+        return self.stats.setdefault(channel_id, CrossOverTargetStats())
+
+    async def _send(
+        self,
+        target: CrossOverTarget,
+        channel: NamelessTextable,
+        send: _RelaySender,
+        started_at: float,
+    ) -> tuple[CrossOverTarget, tuple[int, int | None] | Exception]:
+        """Relay to a single target, never raising."""
+        stats = self.get_stats(target.channel_id)
+        lock = self._channel_locks.setdefault(target.channel_id, asyncio.Lock())
+
+        if stats.is_open:
+            stats.skipped += 1
+            return target, CrossOverCircuitOpen(target.channel_id)
+
+        try:
+            async with lock, self._in_flight, asyncio.timeout(self._SEND_TIMEOUT):
+                sent = await send(target, channel)
+        except Exception as ex:
+            # Anything but an HTTP error or a timeout is worth a traceback,
+            # e.g. aiohttp giving up after its retries, or a bug.
+            logging.warning(
+                "Relay to channel %s failed: %s.",
+                target.channel_id,
+                repr(ex),
+                exc_info=not isinstance(ex, discord.HTTPException | TimeoutError),
+            )
+            self.record_failure(target)
+            return target, ex
+
+        stats.record(time.perf_counter() - started_at)
+        return target, sent
+
+    def record_failure(self, target: CrossOverTarget) -> None:
+        """Count a failed send, opening the circuit if it keeps failing."""
+        stats = self.get_stats(target.channel_id)
+        stats.failed += 1
+        stats.consecutive_failures += 1
+
+        if stats.consecutive_failures < self._BREAKER_THRESHOLD:
+            return
+
+        # Still past the threshold after a cooldown, so a failed probe
+        # opens the circuit again straight away, for twice as long.
+        stats.cooldown = min(
+            max(stats.cooldown * 2, self._BREAKER_COOLDOWN), self._BREAKER_MAX_COOLDOWN
+        )
+        stats.open_until = time.monotonic() + stats.cooldown
+
+        logging.warning(
+            "Pausing relays to channel %s for %.0fs.", target.channel_id, stats.cooldown
+        )
+
+
+crossover_fanout = CrossOverFanOut()
@@ -0,0 +1,174 @@
+import json
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from typing import Self
+
+import discord
+
+from nameless.custom.types import NamelessTextable
+
+__all__ = ["CrossOverAttachmentInfo", "CrossOverSnapshot"]
+
+
+def _avatar_url(path: str, avatar_hash: str) -> str:
+    """Build an avatar URL the way discord.py does, without a client state."""
+    extension = "gif" if avatar_hash.startswith("a_") else "png"
+    return f"{discord.Asset.BASE}/{path}/{avatar_hash}.{extension}?size=1024"
+
+
+@dataclass(frozen=True, slots=True)
+class CrossOverAttachmentInfo:
+    """An attachment of a relayed message, as far as relaying cares."""
+
+    url: str
+    filename: str
+    size: int
+    description: str | None
+    spoiler: bool
+
+    @classmethod
+    def from_attachment(cls, attachment: discord.Attachment) -> Self:
+        """Capture an attachment of a gateway message."""
+        return cls(
+            url=attachment.url,
+            filename=attachment.filename,
+            size=attachment.size,
+            description=attachment.description,
+            spoiler=attachment.is_spoiler(),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CrossOverSnapshot:
+    """
+    Everything needed to relay a message, detached from gateway state.
+
+    Snapshots are plain data, so they can be stored in the outbox and
+    relayed after a restart, when the original objects are long gone.
+    """
+
+    message_id: int
+    guild_id: int
+    channel_id: int
+    content: str
+    author_global_name: str | None
+    author_display_name: str
+    author_avatar_url: str
+    author_display_avatar_url: str
+    guild_name: str
+    guild_icon_url: str
+    channel_name: str
+    attachments: tuple[CrossOverAttachmentInfo, ...] = ()
+    sticker_ids: tuple[int, ...] = ()
+
+    @classmethod
+    def create(
+        cls,
+        message_id: int,
+        content: str,
+        author: discord.abc.User,
+        guild: discord.Guild,
+        channel: NamelessTextable,
+        attachments: Sequence[discord.Attachment] = (),
+        sticker_ids: Sequence[int] = (),
+    ) -> Self:
+        """Capture a message from its parts."""
+        return cls(
+            message_id=message_id,
+            guild_id=guild.id,
+            channel_id=channel.id,
+            content=content,
+            author_global_name=author.global_name,
+            author_display_name=author.display_name,
+            author_avatar_url=author.avatar.url if author.avatar else "",
+            author_display_avatar_url=author.display_avatar.url,
+            guild_name=guild.name,
+            guild_icon_url=guild.icon.url if guild.icon else "",
+            channel_name=channel.name,
+            attachments=tuple(
+                CrossOverAttachmentInfo.from_attachment(x) for x in attachments
+            ),
+            sticker_ids=tuple(sticker_ids),
+        )
+
+    @classmethod
+    def from_message(cls, message: discord.Message) -> Self:
+        """Capture a gateway message."""
+        assert message.guild is not None
+        assert isinstance(message.channel, NamelessTextable)
+
+        return cls.create(
+            message.id,
+            message.content,
+            message.author,
+            message.guild,
+            message.channel,
+            message.attachments,
+            [x.id for x in message.stickers],
+        )
+
+    @classmethod
+    def from_raw_edit(
+        cls,
+        payload: discord.RawMessageUpdateEvent,
+        guild: discord.Guild,
+        channel: NamelessTextable,
+    ) -> Self:
+        """Capture an edited message from its raw event, without any API call."""
+        author = payload.data["author"]
+        member = payload.data.get("member")
+        user_id = int(author["id"])
+
+        avatar_url = (
+            _avatar_url(f"avatars/{user_id}", author["avatar"])
+            if author["avatar"]
+            else ""
+        )
+
+        member_avatar = member.get("avatar") if member is not None else None
+        nick = member.get("nick") if member is not None else None
+
+        if member_avatar:
+            display_avatar_url = _avatar_url(
+                f"guilds/{guild.id}/users/{user_id}/avatars", member_avatar
+            )
+        elif avatar_url:
+            display_avatar_url = avatar_url
+        else:
+            # Same pick of default avatar as `discord.User.default_avatar`.
+            index = (
+                (user_id >> 22) % len(discord.DefaultAvatar)
+                if author["discriminator"] == "0"
+                else int(author["discriminator"]) % 5
+            )
+            display_avatar_url = f"{discord.Asset.BASE}/embed/avatars/{index}.png"
+
+        return cls(
+            message_id=payload.message_id,
+            guild_id=guild.id,
+            channel_id=channel.id,
+            content=payload.data["content"],
+            author_global_name=author.get("global_name"),
+            author_display_name=nick or author.get("global_name") or author["username"],
+            author_avatar_url=avatar_url,
+            author_display_avatar_url=display_avatar_url,
+            guild_name=guild.name,
+            guild_icon_url=guild.icon.url if guild.icon else "",
+            channel_name=channel.name,
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> Self:
+        """Load a snapshot stored with `to_json`."""
+        fields = json.loads(data)
+
+        fields["attachments"] = tuple(
+            CrossOverAttachmentInfo(**x) for x in fields["attachments"]
+        )
+        fields["sticker_ids"] = tuple(fields["sticker_ids"])
+
+        return cls(**fields)
+
+    def to_json(self) -> str:
+        """Serialize this snapshot for storage."""
+        return json.dumps(asdict(self), separators=(",", ":"))
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from typing import Final
+
+import discord
+from prisma.models import CrossChatWebhook
+
+from nameless.custom.types import NamelessTextable
+
+__all__ = ["CrossOverWebhookUnavailable", "CrossOverWebhookPool", "crossover_webhooks"]
+
+
+class CrossOverWebhookUnavailable(Exception):
+    """A relay webhook cannot be created in a channel, for now."""
+
+
+class CrossOverWebhookPool:
+    """
+    Relay webhooks, one per target channel, created lazily and persisted.
+
+    Channels we may not create webhooks in are remembered for a while,
+    so relays there go straight to plain messages instead of spending
+    a refused request (and the invalid request limit) every time.
+    """
+
+    _WEBHOOK_NAME: Final[str] = "nameless* crossover"
+    _FORBIDDEN_COOLDOWN: Final[float] = 10 * 60.0
+
+    def __init__(self):
+        self.webhooks: dict[int, discord.Webhook] = {}
+        self.credentials: dict[int, tuple[int, str]] = {}
+        self.webhook_ids: set[int] = set()
+        self._forbidden_until: dict[int, float] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    async def populate_from_database(self) -> None:
+        """Load every known relay webhook."""
+        logging.info("Loading crossover webhooks.")
+
+        self.webhooks.clear()
+        self.credentials.clear()
+        self.webhook_ids.clear()
+
+        for entry in await CrossChatWebhook.prisma().find_many():
+            self.credentials[entry.ChannelId] = (entry.WebhookId, entry.WebhookToken)
+            self.webhook_ids.add(entry.WebhookId)
+
+    def is_relay_webhook(self, webhook_id: int | None) -> bool:
+        """Check if a webhook is one of ours, so it does not get relayed back."""
+        return webhook_id is not None and webhook_id in self.webhook_ids
+
+    def find(
+        self, client: discord.Client, channel: NamelessTextable
+    ) -> discord.Webhook | None:
+        """Get the relay webhook of a channel, without creating it."""
+        owner = channel.parent if isinstance(channel, discord.Thread) else channel
+        assert owner is not None
+
+        if owner.id in self.webhooks:
+            return self.webhooks[owner.id]
+
+        if owner.id not in self.credentials:
+            return None
+
+        webhook_id, webhook_token = self.credentials[owner.id]
+        webhook = discord.Webhook.partial(webhook_id, webhook_token, client=client)
+
+        self.webhooks[owner.id] = webhook
+        return webhook
+
+    async def get(
+        self, client: discord.Client, channel: NamelessTextable
+    ) -> discord.Webhook:
+        """
+        Get the relay webhook of a channel, creating it if needed.
+
+        Threads share the webhook of their parent channel.
+
+        Raises
+        ------
+        `CrossOverWebhookUnavailable`
+            We may not create a webhook in that channel.
+        """
+        owner = channel.parent if isinstance(channel, discord.Thread) else channel
+        assert owner is not None
+
+        if owner.id in self.webhooks:
+            return self.webhooks[owner.id]
+
+        async with self._locks.setdefault(owner.id, asyncio.Lock()):
+            if owner.id not in self.credentials:
+                if time.monotonic() < self._forbidden_until.get(owner.id, 0.0):
+                    raise CrossOverWebhookUnavailable(owner.id)
+
+                if not owner.permissions_for(owner.guild.me).manage_webhooks:
+                    self._forbid(owner.id)
+                    raise CrossOverWebhookUnavailable(owner.id)
+
+                try:
+                    await self._create(owner)
+                except discord.Forbidden as ex:
+                    # Permission overwrites we could not see, or a race.
+                    self._forbid(owner.id)
+                    raise CrossOverWebhookUnavailable(owner.id) from ex
+
+            webhook = self.find(client, channel)
+            assert webhook is not None
+
+            return webhook
+
+    async def discard(self, channel: NamelessTextable | discord.abc.GuildChannel):
+        """Forget the relay webhook of a channel, e.g. after it got deleted."""
+        owner = channel.parent if isinstance(channel, discord.Thread) else channel
+        assert owner is not None
+
+        await self.discard_by_id(owner.id)
+
+    async def discard_by_id(self, owner_id: int):
+        """Forget the relay webhook of a channel, by the ID of that channel."""
+        self.webhooks.pop(owner_id, None)
+        credentials = self.credentials.pop(owner_id, None)
+
+        if credentials is None:
+            return
+
+        self.webhook_ids.discard(credentials[0])
+        await CrossChatWebhook.prisma().delete_many(where={"ChannelId": owner_id})
+
+    def _forbid(self, owner_id: int) -> None:
+        """Stop trying to create a webhook in a channel, for a cooldown."""
+        logging.info(
+            "No webhook permission in channel %s, sending relays as ourselves.",
+            owner_id,
+        )
+        self._forbidden_until[owner_id] = time.monotonic() + self._FORBIDDEN_COOLDOWN
+
+    async def _create(
+        self, owner: discord.TextChannel | discord.VoiceChannel | discord.ForumChannel
+    ) -> None:
+        """Create and persist a relay webhook."""
+        logging.info("Creating crossover webhook for channel %s.", owner.id)
+
+        webhook = await owner.create_webhook(
+            name=self._WEBHOOK_NAME, reason="Crossover relay webhook."
+        )
+
+        assert webhook.token is not None
+
+        await CrossChatWebhook.prisma().upsert(
+            where={"ChannelId": owner.id},
+            data={
+                "create": {
+                    "ChannelId": owner.id,
+                    "WebhookId": webhook.id,
+                    "WebhookToken": webhook.token,
+                },
+                "update": {"WebhookId": webhook.id, "WebhookToken": webhook.token},
+            },
+        )
+
+        self.credentials[owner.id] = (webhook.id, webhook.token)
+        self.webhook_ids.add(webhook.id)
+
+
+crossover_webhooks = CrossOverWebhookPool()
@@ -0,0 +1,2 @@
+from .baits import *
+from .bans import *
@@ -0,0 +1,69 @@
+import logging
+
+from prisma.models import Guild
+
+__all__ = ["HoneypotBaitMap", "honeypot_baits"]
+
+
+class HoneypotBaitMap:
+    """
+    In-memory index of honeypot bait channels.
+
+    Checking a message is one dict lookup instead of a database query,
+    which matters most in the big, raid-prone guilds the honeypot is
+    activated in. The `Guild` table stays the source of truth.
+    """
+
+    def __init__(self):
+        self.baits: dict[int, int] = {}
+        self.bait_guilds: dict[int, int] = {}
+
+    async def populate_from_database(self) -> None:
+        """Load every active bait channel into memory."""
+        logging.info("Loading honeypot bait channels.")
+
+        self.baits.clear()
+        self.bait_guilds.clear()
+
+        for db_guild in await Guild.prisma().find_many(
+            where={"HoneypotChannelId": {"not": 0}}
+        ):
+            self.add(db_guild.Id, db_guild.HoneypotChannelId)
+
+        logging.info("Loaded %d honeypot bait channel(s).", len(self.baits))
+
+    def get(self, guild_id: int) -> int | None:
+        """Get the bait channel of a guild."""
+        return self.baits.get(guild_id)
+
+    def is_bait(self, channel_id: int) -> bool:
+        """Check if a channel is a bait channel."""
+        return channel_id in self.bait_guilds
+
+    def add(self, guild_id: int, channel_id: int) -> None:
+        """Set the bait channel of a guild."""
+        self.remove_guild(guild_id)
+
+        self.baits[guild_id] = channel_id
+        self.bait_guilds[channel_id] = guild_id
+
+    def remove_guild(self, guild_id: int) -> int | None:
+        """Remove the bait channel of a guild, returning its ID."""
+        channel_id = self.baits.pop(guild_id, None)
+
+        if channel_id is not None:
+            del self.bait_guilds[channel_id]
+
+        return channel_id
+
+    def remove_channel(self, channel_id: int) -> int | None:
+        """Remove a bait channel, returning the ID of its guild."""
+        guild_id = self.bait_guilds.pop(channel_id, None)
+
+        if guild_id is not None:
+            del self.baits[guild_id]
+
+        return guild_id
+
+
+honeypot_baits = HoneypotBaitMap()
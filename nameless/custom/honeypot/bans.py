@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Final
+
+import discord
+
+__all__ = ["HoneypotBanStats", "HoneypotBanQueue", "honeypot_bans"]
+
+
+@dataclass(slots=True)
+class HoneypotBanStats:
+    """Ban counters of a guild, and how fast its latest raid was handled."""
+
+    queued: int = 0
+    deduped: int = 0
+    banned: int = 0
+    failed: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    burst_started_at: float = 0.0
+    burst_banned: int = 0
+    last_burst_banned: int = 0
+    last_burst_duration: float = 0.0
+
+    @property
+    def average_latency(self) -> float:
+        """Average time from bait message to ban, in seconds."""
+        done = self.banned + self.failed
+        return self.total_latency / done if done else 0.0
+
+    @property
+    def last_burst_rate(self) -> float:
+        """Bans per second during the latest raid."""
+        if not self.last_burst_duration:
+            return float(self.last_burst_banned)
+
+        return self.last_burst_banned / self.last_burst_duration
+
+
+class HoneypotBanQueue:
+    """
+    Per-guild ban queue of honeypot catches.
+
+    A raider posting ten messages in the bait channel gets banned once:
+    users already pending, banned a moment ago, or refused a moment ago
+    (e.g. they outrank us) are not queued again, so the guild ban rate
+    limit is spent on raiders that are still free. A few bans per guild
+    run at once, discord.py waits out the rest of the rate limit for us.
+    """
+
+    _PER_GUILD_CONCURRENCY: Final[int] = 4
+    _RECENT_TTL: Final[float] = 10 * 60.0
+
+    def __init__(self):
+        self.stats: dict[int, HoneypotBanStats] = {}
+        self._pending: dict[int, set[int]] = {}
+        self._recent: dict[tuple[int, int], float] = {}
+        self._slots: dict[int, asyncio.Semaphore] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def submit(self, member: discord.Member, reason: str) -> bool:
+        """Queue a ban, returning whether it was not already queued."""
+        guild_id = member.guild.id
+        stats = self.get_stats(guild_id)
+        pending = self._pending.setdefault(guild_id, set())
+
+        if member.id in pending or self._is_recent(guild_id, member.id):
+            stats.deduped += 1
+            return False
+
+        if not pending:
+            stats.burst_started_at = time.monotonic()
+            stats.burst_banned = 0
+
+        pending.add(member.id)
+        stats.queued += 1
+
+        task = asyncio.create_task(self._ban(member, reason, time.monotonic()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return True
+
+    def get_stats(self, guild_id: int) -> HoneypotBanStats:
+        """Get ban counters of a guild."""
+        return self.stats.setdefault(guild_id, HoneypotBanStats())
+
+    def get_depth(self, guild_id: int) -> int:
+        """Count bans of a guild still pending."""
+        return len(self._pending.get(guild_id, ()))
+
+    async def stop(self) -> None:
+        """Cancel every pending ban."""
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        self._tasks.clear()
+        self._pending.clear()
+
+    def _is_recent(self, guild_id: int, user_id: int) -> bool:
+        """Check if a user was banned from a guild, or refused, a moment ago."""
+        banned_at = self._recent.get((guild_id, user_id))
+        return banned_at is not None and time.monotonic() - banned_at < self._RECENT_TTL
+
+    def _prune_recent(self) -> None:
+        """Forget bans, and refusals, older than the dedupe window."""
+        cutoff = time.monotonic() - self._RECENT_TTL
+        self._recent = {k: v for k, v in self._recent.items() if v >= cutoff}
+
+    async def _ban(self, member: discord.Member, reason: str, queued_at: float):
+        """Ban a single member, never raising."""
+        guild_id = member.guild.id
+        stats = self.get_stats(guild_id)
+        slots = self._slots.setdefault(
+            guild_id, asyncio.Semaphore(self._PER_GUILD_CONCURRENCY)
+        )
+
+        try:
+            async with slots:
+                await member.ban(delete_message_days=0, reason=reason)
+        except discord.HTTPException as ex:
+            logging.warning(
+                "Honeypot ban of %s in guild %s failed: %s.",
+                member.id,
+                guild_id,
+                repr(ex),
+            )
+            stats.failed += 1
+
+            # The raider outranks us, or is gone: trying again on their
+            # next bait message would fail the same way.
+            if isinstance(ex, discord.Forbidden | discord.NotFound):
+                self._recent[(guild_id, member.id)] = time.monotonic()
+        else:
+            stats.banned += 1
+            stats.burst_banned += 1
+            self._recent[(guild_id, member.id)] = time.monotonic()
+        finally:
+            latency = time.monotonic() - queued_at
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            self._finish(guild_id, member.id)
+
+    def _finish(self, guild_id: int, user_id: int) -> None:
+        """Mark a ban done, closing the raid burst if it was the last one."""
+        pending = self._pending.get(guild_id)
+
+        if pending is None:
+            return
+
+        pending.discard(user_id)
+
+        if pending:
+            return
+
+        stats = self.get_stats(guild_id)
+        stats.last_burst_banned = stats.burst_banned
+        stats.last_burst_duration = time.monotonic() - stats.burst_started_at
+
+        if stats.burst_banned > 1:
+            logging.warning(
+                "Honeypot banned %d user(s) of guild %s in %.2fs.",
+                stats.burst_banned,
+                guild_id,
+                stats.last_burst_duration,
+            )
+
+        del self._pending[guild_id]
+        self._prune_recent()
+
+
+honeypot_bans = HoneypotBanQueue()
@@ -6,7 +6,10 @@ from bs4 import BeautifulSoup, Tag
 
 from nameless.custom.maimai.models import MaimaiUser
 
-__all__ = ["MaimaiClient"]
+__all__ = ["MAIMAI_CACHE_NAMESPACE", "MaimaiClient"]
+
+MAIMAI_CACHE_NAMESPACE: Final[str] = "maimai"
+"""Cache namespace of linked maimai friend codes, keyed by user ID."""
 
 
 class MaimaiClient:
@@ -0,0 +1,31 @@
+import re
+from collections.abc import Iterable
+
+__all__ = ["NamelessPrefixMatcher"]
+
+
+class NamelessPrefixMatcher:
+    """Command prefix matcher, compiled once and shared by everyone."""
+
+    def __init__(self, prefixes: Iterable[str]):
+        self.prefixes: tuple[str, ...] = ()
+        self._pattern: re.Pattern[str] = re.compile("")
+        self.rebuild(prefixes)
+
+    def rebuild(self, prefixes: Iterable[str]) -> None:
+        """Recompile the matcher with a new prefix list."""
+        # Longest first, so "n" never shadows "n.".
+        unique = sorted({*prefixes}, key=len, reverse=True)
+        assert unique, "At least one prefix is needed."
+
+        self.prefixes = tuple(unique)
+        self._pattern = re.compile("|".join(re.escape(x) for x in unique))
+
+    def is_command(self, content: str) -> bool:
+        """Check if `content` starts with any prefix."""
+        return content.startswith(self.prefixes)
+
+    def match(self, content: str) -> str | None:
+        """Get the prefix `content` starts with, if any."""
+        found = self._pattern.match(content)
+        return found[0] if found else None
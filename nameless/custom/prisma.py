@@ -1,4 +1,5 @@
 import logging
+from typing import LiteralString
 
 import discord
 from prisma import Prisma, models
@@ -7,6 +8,21 @@ __all__ = ["NamelessPrisma"]
 
 _raw_db = Prisma(auto_register=True)
 
+_INDEXES: list[LiteralString] = [
+    'CREATE INDEX IF NOT EXISTS "CrossChatRoom_GuildId_ChannelId_idx" '
+    + 'ON "CrossChatRoom"("GuildId", "ChannelId")',
+    'CREATE INDEX IF NOT EXISTS "CrossChatMessage_OriginMessageId_idx" '
+    + 'ON "CrossChatMessage"("OriginMessageId")',
+    'CREATE INDEX IF NOT EXISTS "CrossChatMessage_MemberId_OriginMessageId_idx" '
+    + 'ON "CrossChatMessage"("MemberId", "OriginMessageId")',
+]
+"""
+Secondary indexes of `schema.prisma`, for databases created before them.
+
+Names follow Prisma's own convention, so `prisma db push` sees them as
+already there.
+"""
+
 
 class NamelessPrisma:
     """A Prisma class to connect to Prisma ORM."""
@@ -24,6 +40,30 @@ class NamelessPrisma:
         await _raw_db.disconnect()
         logging.warning("Prisma WILL NOT be available from now on.")
 
+    @staticmethod
+    async def ensure_indexes():
+        """Create secondary indexes missing from an existing database."""
+        for statement in _INDEXES:
+            try:
+                await _raw_db.execute_raw(statement)
+            except Exception as ex:
+                logging.warning(
+                    "Could not create index, is the schema pushed? %s",
+                    statement,
+                    exc_info=ex,
+                )
+
+    @staticmethod
+    async def optimize():
+        """Let SQLite refresh the statistics its query planner relies on."""
+        await _raw_db.execute_raw("PRAGMA optimize")
+
+    @staticmethod
+    async def vacuum():
+        """Rebuild the database file, giving space of deleted rows back."""
+        logging.info("Vacuuming database.")
+        await _raw_db.execute_raw("VACUUM")
+
     @staticmethod
     async def get_guild_entry(guild: discord.Guild) -> models.Guild:
         """Create a Prisma Guild entry if not exist."""
@@ -39,3 +79,26 @@ class NamelessPrisma:
             where={"Id": user.id},
             data={"create": {"Id": user.id, "MaimaiFriendCode": 0}, "update": {}},
         )
+
+    @staticmethod
+    async def get_room_member_entry(
+        room_id: str, guild_id: int, channel_id: int
+    ) -> models.CrossChatMember:
+        """Create a Prisma CrossChatMember entry if not exist."""
+        return await _raw_db.crosschatmember.upsert(
+            where={
+                "RoomId_GuildId_ChannelId": {
+                    "RoomId": room_id,
+                    "GuildId": guild_id,
+                    "ChannelId": channel_id,
+                }
+            },
+            data={
+                "create": {
+                    "RoomId": room_id,
+                    "GuildId": guild_id,
+                    "ChannelId": channel_id,
+                },
+                "update": {},
+            },
+        )
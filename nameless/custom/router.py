@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+import discord
+
+__all__ = ["NamelessMessageHandler", "NamelessMessageRouter"]
+
+NamelessMessageHandler = Callable[[discord.Message], Awaitable[None]]
+"""A coroutine handling one message."""
+
+
+class NamelessMessageRouter:
+    """
+    Central message dispatcher.
+
+    Handlers subscribe to specific channels or guilds, and each message
+    is delivered only to the handlers subscribed to where it was sent.
+    """
+
+    def __init__(self):
+        self.channel_handlers: dict[int, tuple[NamelessMessageHandler, ...]] = {}
+        self.guild_handlers: dict[int, tuple[NamelessMessageHandler, ...]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def subscribe_channel(
+        self, channel_id: int, handler: NamelessMessageHandler
+    ) -> None:
+        """Deliver messages of a channel to `handler`."""
+        self._subscribe(self.channel_handlers, channel_id, handler)
+
+    def unsubscribe_channel(
+        self, channel_id: int, handler: NamelessMessageHandler
+    ) -> None:
+        """Stop delivering messages of a channel to `handler`."""
+        self._unsubscribe(self.channel_handlers, channel_id, handler)
+
+    def subscribe_guild(self, guild_id: int, handler: NamelessMessageHandler) -> None:
+        """Deliver messages of a guild to `handler`."""
+        self._subscribe(self.guild_handlers, guild_id, handler)
+
+    def unsubscribe_guild(self, guild_id: int, handler: NamelessMessageHandler) -> None:
+        """Stop delivering messages of a guild to `handler`."""
+        self._unsubscribe(self.guild_handlers, guild_id, handler)
+
+    def unsubscribe_all(self, handler: NamelessMessageHandler) -> None:
+        """Remove every subscription of `handler`, e.g. on cog unload."""
+        for index in (self.channel_handlers, self.guild_handlers):
+            for key in [*index]:
+                self._unsubscribe(index, key, handler)
+
+    def dispatch(self, message: discord.Message) -> None:
+        """Deliver a message to its subscribed handlers."""
+        handlers = self.channel_handlers.get(message.channel.id, ())
+
+        if message.guild is not None:
+            handlers += self.guild_handlers.get(message.guild.id, ())
+
+        for handler in handlers:
+            task = asyncio.create_task(self._run(handler, message))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self, handler: NamelessMessageHandler, message: discord.Message
+    ) -> None:
+        """Run a handler, so its failure does not affect the others."""
+        try:
+            await handler(message)
+        except Exception as ex:
+            logging.error("Message handler %s failed.", handler, exc_info=ex)
+
+    def _subscribe(
+        self,
+        index: dict[int, tuple[NamelessMessageHandler, ...]],
+        key: int,
+        handler: NamelessMessageHandler,
+    ) -> None:
+        """Add a handler to an index."""
+        handlers = index.get(key, ())
+
+        if handler not in handlers:
+            index[key] = (*handlers, handler)
+
+    def _unsubscribe(
+        self,
+        index: dict[int, tuple[NamelessMessageHandler, ...]],
+        key: int,
+        handler: NamelessMessageHandler,
+    ) -> None:
+        """Remove a handler from an index."""
+        handlers = tuple(x for x in index.get(key, ()) if x != handler)
+
+        if handlers:
+            index[key] = handlers
+        else:
+            index.pop(key, None)
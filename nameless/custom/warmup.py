@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from typing import Final
+
+from prisma.models import User
+
+from nameless.config import nameless_config
+from nameless.custom.cache import nameless_cache
+from nameless.custom.crossover import crossover_routes, crossover_webhooks
+from nameless.custom.honeypot import honeypot_baits
+from nameless.custom.maimai import MAIMAI_CACHE_NAMESPACE
+
+__all__ = ["NamelessWarmUp", "nameless_warmup"]
+
+
+class NamelessWarmUp:
+    """
+    Startup rebuild of in-memory state from the database.
+
+    Indexes the bot cannot work without (crossover rooms and webhooks,
+    honeypot bait channels) are always loaded in full. Cache entries are
+    then reconciled with the database in pages, under a time budget:
+    past it, startup goes on with the persisted cache as a hint, and the
+    rest of the warm-up finishes in the background.
+    """
+
+    _PAGE_SIZE: Final[int] = 1000
+
+    def __init__(self):
+        self._task: asyncio.Task[None] | None = None
+
+    async def run(self) -> None:
+        """Load indexes, then warm the cache for at most the configured budget."""
+        started_at = time.perf_counter()
+
+        await crossover_routes.populate_from_database()
+        await crossover_webhooks.populate_from_database()
+        await honeypot_baits.populate_from_database()
+
+        budget: float = nameless_config["cache"]["warmup_budget"]
+        remaining = max(budget - (time.perf_counter() - started_at), 0.0)
+
+        self._task = asyncio.create_task(self._warm_cache())
+
+        # Shielded, running out of budget only stops waiting on it.
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), remaining)
+        except TimeoutError:
+            logging.warning(
+                "Cache warm-up is over its %.1fs budget, finishing in background.",
+                budget,
+            )
+            return
+
+        logging.info(
+            "Warmed up from database in %.2fs.", time.perf_counter() - started_at
+        )
+
+    async def stop(self) -> None:
+        """Cancel a warm-up still running in background."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _warm_cache(self) -> None:
+        """Reconcile every cache namespace with the database."""
+        try:
+            await self._warm_maimai()
+        except Exception as ex:
+            # The persisted cache is still there, and misses go to the database.
+            logging.error("Cache warm-up failed.", exc_info=ex)
+
+    async def _warm_maimai(self) -> None:
+        """Cache every linked friend code, dropping links gone from the database."""
+        seen: set[str] = set()
+        cursor: int | None = None
+
+        while True:
+            # Cursor paging, so every page is an index range scan.
+            rows = await User.prisma().find_many(
+                where={"MaimaiFriendCode": {"not": 0}},
+                order={"Id": "asc"},
+                take=self._PAGE_SIZE,
+                cursor={"Id": cursor} if cursor is not None else None,
+                skip=1 if cursor is not None else None,
+            )
+
+            for row in rows:
+                key = str(row.Id)
+                seen.add(key)
+
+                # Peeked at, a lookup would count as a hit and touch the LRU.
+                entry = nameless_cache.entries.get((MAIMAI_CACHE_NAMESPACE, key))
+
+                if entry is None or entry.value != row.MaimaiFriendCode:
+                    nameless_cache.set(
+                        MAIMAI_CACHE_NAMESPACE, key, row.MaimaiFriendCode
+                    )
+
+            if len(rows) < self._PAGE_SIZE:
+                break
+
+            cursor = rows[-1].Id
+
+        stale = [
+            key
+            for (namespace, key), entry in [*nameless_cache.entries.items()]
+            if namespace == MAIMAI_CACHE_NAMESPACE
+            and not entry.negative
+            and key not in seen
+        ]
+
+        for key in stale:
+            nameless_cache.invalidate(MAIMAI_CACHE_NAMESPACE, key)
+
+        logging.info(
+            "Warmed %d maimai link(s), dropped %d stale.", len(seen), len(stale)
+        )
+
+
+nameless_warmup = NamelessWarmUp()
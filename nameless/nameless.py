@@ -11,7 +11,20 @@ from discord.ext import commands
 
 from nameless.config import nameless_config
 from nameless.custom.cache import nameless_cache
+from nameless.custom.crossover import (
+    CrossOverAttachments,
+    CrossOverMigration,
+    crossover_edits,
+    crossover_messages,
+    crossover_outbox,
+    crossover_processes,
+    crossover_retention,
+)
+from nameless.custom.honeypot import honeypot_bans
+from nameless.custom.prefix import NamelessPrefixMatcher
 from nameless.custom.prisma import NamelessPrisma
+from nameless.custom.router import NamelessMessageRouter
+from nameless.custom.warmup import nameless_warmup
 
 __all__ = ["Nameless"]
 
@@ -27,12 +40,13 @@ class Nameless(commands.Bot):
         _intents.message_content = True
         _intents.members = True
 
-        _prefixes: list[str] = nameless_config["command"]["prefixes"]
-        _prefixes.append("nl.")
-        _prefixes = [*set(_prefixes)]
+        self.prefix_matcher: NamelessPrefixMatcher = NamelessPrefixMatcher(
+            self._get_configured_prefixes()
+        )
+        self.message_router: NamelessMessageRouter = NamelessMessageRouter()
 
         super().__init__(
-            commands.when_mentioned_or(*_prefixes),
+            self._match_prefix,
             *args,
             intents=_intents,
             description=_description,
@@ -41,8 +55,15 @@ class Nameless(commands.Bot):
 
     @override
     async def setup_hook(self):
+        self.rebuild_prefix_matcher()
+
         await NamelessPrisma.init()
+        await NamelessPrisma.ensure_indexes()
+        # Only a fast-start hint, the warm-up reconciles it with the database.
         nameless_cache.populate_from_persistence()
+        await CrossOverMigration.migrate_connections()
+        await nameless_warmup.run()
+        crossover_retention.start()
         await self._register_commands()
 
         logging.info("Syncing commands.")
@@ -60,6 +81,11 @@ class Nameless(commands.Bot):
         logging.info("nameless* is now operational!")
         nameless_config["nameless"]["start_time"] = datetime.now(UTC)
 
+    @override
+    async def on_message(self, message: discord.Message, /):
+        self.message_router.dispatch(message)
+        await self.process_commands(message)
+
     @override
     async def on_command_error(
         self, ctx: commands.Context[Self], ex: commands.errors.CommandError
@@ -80,6 +106,14 @@ class Nameless(commands.Bot):
     @override
     async def close(self):
         logging.warning("Shutting down...")
+        await nameless_warmup.stop()
+        await crossover_outbox.stop()
+        await crossover_processes.stop()
+        await CrossOverAttachments.close_session()
+        await crossover_retention.stop()
+        await crossover_edits.stop()
+        await honeypot_bans.stop()
+        await crossover_messages.close()
         await NamelessPrisma.dispose()
         nameless_cache.yank_to_persitence()
         await super().close()
@@ -134,13 +168,24 @@ class Nameless(commands.Bot):
             except commands.ExtensionFailed as ex:
                 logging.error("Command load failure.", exc_info=ex)
 
-    def get_prefix_list(self) -> list[str]:
-        """Get prefix list."""
-        assert self.user is not None
+    def rebuild_prefix_matcher(self) -> None:
+        """Rebuild prefix matcher, after login or config changes."""
+        prefixes = self._get_configured_prefixes()
+
+        if self.user is not None:
+            prefixes.extend([f"<@{self.user.id}> ", f"<@!{self.user.id}> "])
 
-        _prefixes: list[str] = nameless_config["command"]["prefixes"]
-        _prefixes.append("nl.")
-        _prefixes.append(self.user.mention)
-        _prefixes = [*set(_prefixes)]
+        self.prefix_matcher.rebuild(prefixes)
 
-        return _prefixes
+    def _get_configured_prefixes(self) -> list[str]:
+        """Get prefixes from config, plus the default one."""
+        return [*nameless_config["command"]["prefixes"], "nl."]
+
+    def _match_prefix(self, _: Self, message: discord.Message) -> str:
+        """Get command prefix of a message, for `commands.Bot`."""
+        # Any prefix does when nothing matches, the command parser
+        # will fail to skip it all the same.
+        return (
+            self.prefix_matcher.match(message.content)
+            or self.prefix_matcher.prefixes[0]
+        )
@@ -0,0 +1,238 @@
+"""
+Benchmark the hot crossover queries, without and with secondary indexes.
+
+Seeds a throwaway SQLite database shaped like `prisma/schema.prisma`,
+times every query on it, adds the indexes of `schema.prisma`, then
+times them again. Only needs the standard library:
+
+    python scripts/bench_indexes.py --messages 3000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE "Guild" (
+    "Id" BIGINT NOT NULL PRIMARY KEY,
+    "HoneypotChannelId" BIGINT NOT NULL
+);
+CREATE TABLE "CrossChatRoom" (
+    "Id" TEXT NOT NULL PRIMARY KEY,
+    "GuildId" BIGINT NOT NULL,
+    "ChannelId" BIGINT NOT NULL,
+    "IsPublic" BOOLEAN NOT NULL DEFAULT true
+);
+CREATE TABLE "CrossChatMember" (
+    "Id" TEXT NOT NULL PRIMARY KEY,
+    "RoomId" TEXT NOT NULL,
+    "GuildId" BIGINT NOT NULL,
+    "ChannelId" BIGINT NOT NULL
+);
+CREATE UNIQUE INDEX "CrossChatMember_RoomId_GuildId_ChannelId_key"
+    ON "CrossChatMember"("RoomId", "GuildId", "ChannelId");
+CREATE TABLE "CrossChatMessage" (
+    "Id" TEXT NOT NULL PRIMARY KEY,
+    "ConnectionId" TEXT,
+    "MemberId" TEXT,
+    "OriginMessageId" BIGINT NOT NULL,
+    "ClonedMessageId" BIGINT NOT NULL,
+    "WebhookId" BIGINT
+);
+"""
+
+_INDEXES = """
+CREATE INDEX "CrossChatRoom_GuildId_ChannelId_idx"
+    ON "CrossChatRoom"("GuildId", "ChannelId");
+CREATE INDEX "CrossChatMessage_OriginMessageId_idx"
+    ON "CrossChatMessage"("OriginMessageId");
+CREATE INDEX "CrossChatMessage_MemberId_OriginMessageId_idx"
+    ON "CrossChatMessage"("MemberId", "OriginMessageId");
+PRAGMA optimize;
+"""
+
+# 2024-01-01, as a Discord snowflake.
+_FIRST_SNOWFLAKE = 1191487148441600000
+
+
+def _random_id() -> str:
+    return "c" + os.urandom(12).hex()
+
+
+def seed(db: sqlite3.Connection, messages: int, rooms: int, members: int) -> None:
+    """Fill the database with plausible rows."""
+    rng = random.Random(0)
+
+    room_rows = [
+        (_random_id(), rng.getrandbits(62), rng.getrandbits(62)) for _ in range(rooms)
+    ]
+    db.executemany(
+        'INSERT INTO "CrossChatRoom"("Id", "GuildId", "ChannelId") VALUES (?, ?, ?)',
+        room_rows,
+    )
+
+    member_ids = [_random_id() for _ in range(members)]
+    db.executemany(
+        'INSERT INTO "CrossChatMember" VALUES (?, ?, ?, ?)',
+        [
+            (x, room_rows[i % rooms][0], rng.getrandbits(62), rng.getrandbits(62))
+            for i, x in enumerate(member_ids)
+        ],
+    )
+
+    # Snowflakes grow with time, about one relayed message a second.
+    batch: list[tuple[str, str | None, int, int]] = []
+    snowflake = _FIRST_SNOWFLAKE
+
+    for i in range(messages):
+        snowflake += rng.randrange(1, 2000) << 22
+        member_id = None if i % 1000 == 0 else rng.choice(member_ids)
+        batch.append((_random_id(), member_id, snowflake, snowflake + (1 << 22)))
+
+        if len(batch) == 100_000:
+            db.executemany(
+                'INSERT INTO "CrossChatMessage"'
+                + '("Id", "MemberId", "OriginMessageId", "ClonedMessageId") '
+                + "VALUES (?, ?, ?, ?)",
+                batch,
+            )
+            batch.clear()
+
+    db.executemany(
+        'INSERT INTO "CrossChatMessage"'
+        + '("Id", "MemberId", "OriginMessageId", "ClonedMessageId") '
+        + "VALUES (?, ?, ?, ?)",
+        batch,
+    )
+    db.commit()
+
+
+def build_queries(
+    db: sqlite3.Connection,
+) -> dict[str, Callable[[], list[tuple[object, ...]]]]:
+    """Create the hot queries, with parameters picked from the seeded data."""
+    rng = random.Random(1)
+
+    origin_ids = [
+        x for (x,) in db.execute('SELECT "OriginMessageId" FROM "CrossChatMessage"')
+    ]
+    member_ids = [x for (x,) in db.execute('SELECT "Id" FROM "CrossChatMember"')]
+    rooms = db.execute('SELECT "GuildId", "ChannelId" FROM "CrossChatRoom"').fetchall()
+
+    def get_clones() -> list[tuple[object, ...]]:
+        ids = rng.sample(origin_ids, 10)
+        return db.execute(
+            'SELECT * FROM "CrossChatMessage" WHERE "OriginMessageId" IN '
+            + f"({', '.join('?' * len(ids))})",
+            ids,
+        ).fetchall()
+
+    def bulk_delete_lookup() -> list[tuple[object, ...]]:
+        ids = rng.sample(origin_ids, 100)
+        return db.execute(
+            'SELECT * FROM "CrossChatMessage" WHERE "OriginMessageId" IN '
+            + f"({', '.join('?' * len(ids))})",
+            ids,
+        ).fetchall()
+
+    def find_room() -> list[tuple[object, ...]]:
+        return db.execute(
+            'SELECT * FROM "CrossChatRoom" WHERE "GuildId" = ? AND "ChannelId" = ? '
+            + "LIMIT 1",
+            rng.choice(rooms),
+        ).fetchall()
+
+    def retention_by_age() -> list[tuple[object, ...]]:
+        # The last, empty batch every run ends with.
+        return db.execute(
+            'SELECT "Id" FROM "CrossChatMessage" WHERE "OriginMessageId" < ? '
+            + "LIMIT 500",
+            (_FIRST_SNOWFLAKE,),
+        ).fetchall()
+
+    def retention_orphans() -> list[tuple[object, ...]]:
+        return db.execute(
+            'SELECT "Id" FROM "CrossChatMessage" WHERE "MemberId" IS NULL LIMIT 500'
+        ).fetchall()
+
+    def retention_by_count() -> list[tuple[object, ...]]:
+        return db.execute(
+            'SELECT "Id" FROM "CrossChatMessage" WHERE "MemberId" = ? '
+            + 'ORDER BY "OriginMessageId" DESC LIMIT 500 OFFSET 1000',
+            (rng.choice(member_ids),),
+        ).fetchall()
+
+    return {
+        "get_clones (10 origins)": get_clones,
+        "bulk delete (100 origins)": bulk_delete_lookup,
+        "find room of channel": find_room,
+        "retention by age": retention_by_age,
+        "retention orphans": retention_orphans,
+        "retention by count": retention_by_count,
+    }
+
+
+def measure(
+    queries: dict[str, Callable[[], list[tuple[object, ...]]]], runs: int
+) -> dict[str, float]:
+    """Median time of every query, in milliseconds."""
+    result: dict[str, float] = {}
+
+    for name, query in queries.items():
+        timings: list[float] = []
+
+        for _ in range(runs):
+            started_at = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - started_at) * 1000)
+
+        result[name] = statistics.median(timings)
+
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the hot crossover queries.")
+    parser.add_argument("--messages", type=int, default=3_000_000)
+    parser.add_argument("--rooms", type=int, default=50_000)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = sqlite3.connect(Path(temp_dir) / "bench.sqlite")
+        db.executescript(_SCHEMA)
+
+        started_at = time.perf_counter()
+        seed(db, args.messages, args.rooms, args.members)
+        print(
+            f"Seeded {args.messages} messages, {args.rooms} rooms, "
+            + f"{args.members} members in {time.perf_counter() - started_at:.1f}s."
+        )
+
+        queries = build_queries(db)
+        before = measure(queries, args.runs)
+
+        started_at = time.perf_counter()
+        db.executescript(_INDEXES)
+        print(f"Created indexes in {time.perf_counter() - started_at:.1f}s.")
+
+        after = measure(queries, args.runs)
+        db.close()
+
+    print()
+    print(f"{'query':<28}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+
+    for name in queries:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<28}{before[name]:>14.3f}{after[name]:>14.3f}{speedup:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()